@@ -1,43 +1,158 @@
 import numpy as np
 
+from AntColony_PyCode import candidate_list, compiled_kernels, exact_path, incremental, instrumentation, matrix_storage, parallel_colony
+from AntColony_PyCode.distance_matrix import pairwise_distances
+from pvt_Data.pvt_dataset import column_values
+
 class AntColonyOptimization:
-    def __init__(self, pvt_data, num_ants=10, num_iterations=100, decay=0.95, alpha=1, beta=2):
+    def __init__(self, pvt_data, num_ants=10, num_iterations=100, decay=0.95, alpha=1, beta=2, construction='scalar',
+                 candidate_k=None, storage_dir=None, memory_budget=None, lazy_evaporation=False,
+                 num_workers=None, seed=None, stopping=None, local_search=None, solver='colony', tracer=None, backend='numpy'):
+        if construction not in ('scalar', 'vectorized'):
+            raise ValueError("construction must be 'scalar' or 'vectorized'")
+        if candidate_k is not None and construction != 'scalar':
+            raise ValueError("candidate_k can only be used with construction='scalar'")
+        if candidate_k is not None and num_workers and num_workers > 1:
+            raise ValueError("num_workers > 1 needs the dense matrices, so it cannot be used with candidate_k")
         self.pvt_data = pvt_data
         self.num_ants = num_ants
         self.num_iterations = num_iterations
         self.decay = decay
         self.alpha = alpha
         self.beta = beta
-        self.distance_matrix = self.calculate_distance_matrix()
-        self.pheromone_matrix = np.ones_like(self.distance_matrix) / len(pvt_data)
+        self.construction = construction
+        self.candidate_k = candidate_k
+        self.memory_budget = memory_budget
+        # With lazy evaporation the real pheromone is pheromone_matrix * pheromone_scale
+        self.lazy_evaporation = lazy_evaporation
+        self.pheromone_scale = 1.0
+        # Ants of an iteration are spread over num_workers processes, seeded from seed; the workers
+        # always use the vectorized construction (see parallel_colony.ParallelPathBuilder)
+        self.num_workers = num_workers
+        self.seed = seed
+        # Optional StoppingCriteria; run() records which criterion ended it and after how many iterations
+        self.stopping = stopping
+        self.stop_reason = None
+        self.iterations_run = 0
+        # Optional LocalSearch applied to the constructed paths before they deposit pheromone
+        self.local_search = local_search
+        # Optional instrumentation.IterationTracer that records phase times and convergence metrics
+        self.tracer = tracer
+        # 'numba' runs construction, path costs and deposits of the dense matrices as compiled kernels
+        # (see compiled_kernels); 'auto' uses them when Numba is installed
+        self.backend = compiled_kernels.resolve_backend(backend)
+        # Global shortest cost after every iteration of the last run
+        self.history = []
+        # The distance is one-dimensional, so solver='exact' or 'auto' returns the pressure-sorted path
+        # (see exact_path.sorted_path) without building any matrices
+        self.solver = solver
+        self.exact_solution = exact_path.resolve_solver(solver, column_values(pvt_data, 'bubble_point_pressure'), 'l1')
+        if self.exact_solution is not None:
+            self.distance_matrix = None
+            self.pheromone_matrix = None
+            self.storage_dir = None
+        elif candidate_k is None:
+            # Matrices go to np.memmap files when a storage directory is given or they exceed the memory budget
+            self.storage_dir = matrix_storage.resolve_storage_dir(storage_dir, len(pvt_data), 8, memory_budget,
+                                                                  owner=self)
+            if num_workers and num_workers > 1:
+                parallel_colony.check_colony(self)
+            self.distance_matrix = self.calculate_distance_matrix()
+            self.pheromone_matrix = matrix_storage.allocate(self.distance_matrix.shape, self.distance_matrix.dtype,
+                                                            self.storage_dir, 'pheromone')
+            matrix_storage.fill_blockwise(self.pheromone_matrix, 1.0 / len(pvt_data), memory_budget)
+        else:
+            # Only the k nearest neighbours of each point keep a distance and a pheromone value
+            self.features = candidate_list.as_feature_array(column_values(pvt_data, 'bubble_point_pressure'))
+            self.candidates, self.candidate_distances = candidate_list.nearest_neighbours(self.features, candidate_k)
+            self.candidate_heuristic = (1.0 / (self.candidate_distances + 1e-10)) ** self.beta
+            self.candidate_pheromone = np.ones_like(self.candidate_distances) / len(pvt_data)
+            self.distance_matrix = None
+            self.pheromone_matrix = None
+            self.storage_dir = None
         self.shortest_path = None
         self.shortest_cost = np.inf
+        self.heuristic_matrix = None
 
     def calculate_distance_matrix(self):
-        num_points = len(self.pvt_data)
-        dist_matrix = np.zeros((num_points, num_points))
-        for i in range(num_points):
-            for j in range(num_points):
-                if i != j:
-                    # Use a simple distance metric; can be adjusted based on your data
-                    dist_matrix[i, j] = np.abs(self.pvt_data[i]['bubble_point_pressure'] - self.pvt_data[j]['bubble_point_pressure'])
-        return dist_matrix
+        # Absolute difference in bubble point pressure; can be adjusted based on your data
+        pressures = column_values(self.pvt_data, 'bubble_point_pressure')
+        out = matrix_storage.allocate((len(pressures), len(pressures)), np.float64, self.storage_dir, 'distance')
+        return pairwise_distances(pressures, metric='l1', out=out,
+                                  memory_budget=self.memory_budget or matrix_storage.DEFAULT_BLOCK_BUDGET)
+
+    def add_points(self, new_data):
+        """Add new PVT records, extending the matrices and the best path instead of starting over.
+
+        Call run() afterwards (usually with fewer iterations) to refine the warm-started colony.
+        """
+        return incremental.add_points(self, new_data, lambda data: column_values(data, 'bubble_point_pressure'), 'l1')
 
     def run(self):
-        for _ in range(self.num_iterations):
-            # Initialize ants
-            ants_paths = self.generate_ant_paths()
-            # Update pheromone levels
-            self.update_pheromone(ants_paths)
-            # Find the shortest path
-            shortest_path, shortest_cost = self.get_shortest_path(ants_paths)
-            # Update global shortest path
-            if shortest_cost < self.shortest_cost:
-                self.shortest_path = shortest_path
-                self.shortest_cost = shortest_cost
+        if self.exact_solution is not None:
+            return self.use_exact_solution()
+        if self.stopping is not None:
+            self.stopping.reset()
+        self.stop_reason = 'max_iterations'
+        self.history = []
+        if self.tracer is not None:
+            self.tracer.start()
+        with parallel_colony.path_builder(self) as generate_ant_paths:
+            for iteration in range(1, self.num_iterations + 1):
+                self.run_iteration(iteration, generate_ant_paths)
+                if self.stopping is not None:
+                    pheromone = self.pheromone_matrix if self.candidate_k is None else self.candidate_pheromone
+                    reason = self.stopping.check(iteration, self.shortest_cost, pheromone)
+                    if reason is not None:
+                        self.stop_reason = reason
+                        break
+        return self.shortest_path, self.shortest_cost
+
+    def run_iteration(self, iteration, generate_ant_paths=None):
+        """One iteration of run(): build, improve and deposit the ants' paths and update the shortest path.
+
+        generate_ant_paths is the function from parallel_colony.path_builder (the
+        colony's own generate_ant_paths when None). Returns the ants' paths.
+        """
+        generate_ant_paths = self.generate_ant_paths if generate_ant_paths is None else generate_ant_paths
+        timer = self.tracer.timer(iteration) if self.tracer is not None else instrumentation.NO_TIMER
+        # Initialize ants
+        ants_paths = generate_ant_paths()
+        timer.lap('construction')
+        if self.local_search is not None:
+            ants_paths = self.local_search.apply(self, ants_paths)
+            timer.lap('local_search')
+        # Update pheromone levels
+        self.update_pheromone(ants_paths)
+        timer.lap('pheromone')
+        # Find the shortest path
+        shortest_path, shortest_cost = self.get_shortest_path(ants_paths)
+        timer.lap('evaluation')
+        # Update global shortest path
+        if shortest_cost < self.shortest_cost:
+            self.shortest_path = shortest_path
+            self.shortest_cost = shortest_cost
+        timer.record(self, iteration, ants_paths)
+        self.history.append(self.shortest_cost)
+        self.iterations_run = iteration
+        return ants_paths
+
+    def use_exact_solution(self):
+        self.shortest_path, self.shortest_cost = self.exact_solution
+        self.history = [self.shortest_cost]
+        self.iterations_run = 0
+        self.stop_reason = 'exact'
         return self.shortest_path, self.shortest_cost
 
     def generate_ant_paths(self):
+        if self.backend == 'numba' and self.candidate_k is None:
+            return self.generate_ant_paths_compiled()
+        if self.construction == 'vectorized':
+            return self.generate_ant_paths_vectorized()
+        if self.candidate_k is not None:
+            return [candidate_list.construct_path(self.candidates, self.candidate_heuristic, self.candidate_pheromone,
+                                                  self.features, self.alpha, self.beta, 1.0 / len(self.pvt_data))
+                    for _ in range(self.num_ants)]
         num_points = len(self.pvt_data)
         ants_paths = []
         for _ in range(self.num_ants):
@@ -52,6 +167,52 @@ class AntColonyOptimization:
             ants_paths.append(path)
         return ants_paths
 
+    def generate_ant_paths_vectorized(self):
+        """Build all ants' paths together, one vectorized step per node."""
+        num_points = len(self.pvt_data)
+        # The heuristic only depends on the distances, so it is computed once per run.
+        # With on-disk matrices both factors are computed from the rows each step instead.
+        if self.storage_dir is None:
+            if self.heuristic_matrix is None:
+                self.heuristic_matrix = (1.0 / (self.distance_matrix + 1e-10)) ** self.beta
+            pheromone = self.pheromone_matrix ** self.alpha
+
+        # Draw the random numbers in the same order as the scalar path so a fixed seed gives the same paths
+        starts, draws = compiled_kernels.draw_random_numbers(self.num_ants, num_points)
+
+        ants = np.arange(self.num_ants)
+        paths = np.empty((self.num_ants, num_points), dtype=int)
+        paths[:, 0] = starts
+        visited = np.zeros((self.num_ants, num_points), dtype=bool)
+        visited[ants, starts] = True
+        current = starts
+        for step in range(1, num_points):
+            if self.storage_dir is None:
+                rows = pheromone[current] * np.where(visited, 0, self.heuristic_matrix[current])
+            else:
+                heuristic = (1.0 / (self.distance_matrix[current] + 1e-10)) ** self.beta
+                rows = self.pheromone_matrix[current] ** self.alpha * np.where(visited, 0, heuristic)
+            totals = np.sum(rows, axis=1, keepdims=True)
+            compiled_kernels.check_weights(rows, totals)
+            probs = rows / totals
+            cdf = np.cumsum(probs, axis=1)
+            cdf /= cdf[:, -1:]
+            # Same rule as np.random.choice: first node whose cumulative probability exceeds the draw
+            current = np.sum(cdf <= draws[:, step - 1, None], axis=1)
+            paths[:, step] = current
+            visited[ants, current] = True
+        return paths
+
+    def generate_ant_paths_compiled(self):
+        """Build all ants' paths with the compiled kernel, from the same random numbers as the other constructions."""
+        starts, draws = compiled_kernels.draw_random_numbers(self.num_ants, len(self.pvt_data))
+        if self.storage_dir is not None:
+            return compiled_kernels.construct_paths_from_matrices(self.pheromone_matrix, self.distance_matrix,
+                                                                  self.alpha, self.beta, starts, draws)
+        if self.heuristic_matrix is None:
+            self.heuristic_matrix = (1.0 / (self.distance_matrix + 1e-10)) ** self.beta
+        return compiled_kernels.construct_paths(self.pheromone_matrix ** self.alpha, self.heuristic_matrix, starts, draws)
+
     def calculate_probabilities(self, current_point, visited):
         pheromone = self.pheromone_matrix[current_point]
         dist = self.distance_matrix[current_point]
@@ -61,12 +222,38 @@ class AntColonyOptimization:
         return probabilities
 
     def update_pheromone(self, ants_paths):
-        self.pheromone_matrix *= self.decay
+        if self.candidate_k is not None:
+            self.candidate_pheromone *= self.decay
+        elif self.lazy_evaporation:
+            # Evaporation only shrinks the global scale, so deposits are stored divided by it
+            self.pheromone_scale *= self.decay
+            if self.pheromone_scale < matrix_storage.RENORMALIZE_BELOW:
+                self.pheromone_scale = matrix_storage.renormalize(self.pheromone_matrix, self.pheromone_scale,
+                                                                  self.memory_budget)
+        else:
+            matrix_storage.scale_blockwise(self.pheromone_matrix, self.decay, self.memory_budget)
+        if self.backend == 'numba' and self.candidate_k is None:
+            compiled_kernels.deposit_pheromone(self.pheromone_matrix, self.distance_matrix, np.asarray(ants_paths),
+                                               self.pheromone_scale)
+            return
         for path in ants_paths:
-            for i in range(len(path) - 1):
-                self.pheromone_matrix[path[i], path[i+1]] += 1.0 / self.distance_matrix[path[i], path[i+1]]
+            self.deposit_pheromone(path)
+
+    def deposit_pheromone(self, path, weight=1.0):
+        # Every edge of the path gets weight / distance
+        path = np.asarray(path)
+        if self.candidate_k is not None:
+            distances = candidate_list.edge_distances(self.features, path[:-1], path[1:])
+            candidate_list.deposit_pheromone(self.candidates, self.candidate_pheromone, path, weight / (distances + 1e-10))
+            return
+        deposits = weight / self.distance_matrix[path[:-1], path[1:]]
+        np.add.at(self.pheromone_matrix, (path[:-1], path[1:]), deposits / self.pheromone_scale)
 
     def get_shortest_path(self, ants_paths):
+        if self.backend == 'numba' and self.candidate_k is None:
+            costs = compiled_kernels.path_costs(self.distance_matrix, np.asarray(ants_paths))
+            ant = int(np.argmin(costs))
+            return ants_paths[ant], costs[ant]
         shortest_cost = np.inf
         shortest_path = None
         for path in ants_paths:
@@ -77,6 +264,9 @@ class AntColonyOptimization:
         return shortest_path, shortest_cost
 
     def calculate_path_cost(self, path):
+        if self.candidate_k is not None:
+            path = np.asarray(path)
+            return np.sum(candidate_list.edge_distances(self.features, path[:-1], path[1:]))
         path_cost = 0
         for i in range(len(path) - 1):
             path_cost += self.distance_matrix[path[i], path[i+1]]
@@ -0,0 +1,121 @@
+import numpy as np
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+
+def as_feature_array(features):
+    """Return the features as a contiguous (n, d) float array."""
+    features = np.ascontiguousarray(features, dtype=float)
+    if features.ndim == 1:
+        features = features[:, None]
+    return features
+
+
+def nearest_neighbours(features, k, chunk_size=1024):
+    """Find the k nearest neighbours of every point (excluding the point itself).
+
+    Returns an (n, k) array of neighbour indices and the matching (n, k) array of
+    Euclidean distances, both sorted from nearest to farthest.
+    """
+    features = as_feature_array(features)
+    num_points = len(features)
+    k = min(k, num_points - 1)
+    if k < 1:
+        return np.empty((num_points, 0), dtype=int), np.empty((num_points, 0))
+
+    if features.shape[1] == 1:
+        return _nearest_neighbours_sorted(features[:, 0], k)
+
+    if cKDTree is not None:
+        # Ask for one extra neighbour so the point itself can be dropped
+        distances, indices = cKDTree(features).query(features, k=k + 1)
+        return _drop_self(indices, distances, k)
+
+    indices = np.empty((num_points, k), dtype=int)
+    distances = np.empty((num_points, k))
+    for start in range(0, num_points, chunk_size):
+        stop = min(start + chunk_size, num_points)
+        block = np.sqrt(((features[start:stop, None, :] - features[None, :, :]) ** 2).sum(axis=2))
+        block[np.arange(stop - start), np.arange(start, stop)] = np.inf
+        nearest = np.argpartition(block, k - 1, axis=1)[:, :k]
+        nearest_dist = np.take_along_axis(block, nearest, axis=1)
+        order = np.argsort(nearest_dist, axis=1)
+        indices[start:stop] = np.take_along_axis(nearest, order, axis=1)
+        distances[start:stop] = np.take_along_axis(nearest_dist, order, axis=1)
+    return indices, distances
+
+
+def _nearest_neighbours_sorted(values, k):
+    # For a 1-D metric the k nearest neighbours lie within k positions of the point in sorted order
+    num_points = len(values)
+    order = np.argsort(values, kind='stable')
+    sorted_values = values[order]
+    offsets = np.concatenate([np.arange(-k, 0), np.arange(1, k + 1)])
+    positions = np.arange(num_points)[:, None] + offsets[None, :]
+    valid = (positions >= 0) & (positions < num_points)
+    positions = np.clip(positions, 0, num_points - 1)
+    window_dist = np.where(valid, np.abs(sorted_values[positions] - sorted_values[:, None]), np.inf)
+    nearest = np.argsort(window_dist, axis=1, kind='stable')[:, :k]
+
+    indices = np.empty((num_points, k), dtype=int)
+    distances = np.empty((num_points, k))
+    indices[order] = order[np.take_along_axis(positions, nearest, axis=1)]
+    distances[order] = np.take_along_axis(window_dist, nearest, axis=1)
+    return indices, distances
+
+
+def _drop_self(indices, distances, k):
+    # Duplicate points can push a point out of the first column, so remove it by index
+    num_points = len(indices)
+    is_self = indices == np.arange(num_points)[:, None]
+    # Rows where the point itself was not returned drop their farthest neighbour instead
+    is_self[~is_self.any(axis=1), -1] = True
+    keep = ~is_self
+    return indices[keep].reshape(num_points, k), distances[keep].reshape(num_points, k)
+
+
+def edge_distances(features, origins, targets):
+    """Euclidean distances between pairs of points given as index arrays."""
+    diff = features[origins] - features[targets]
+    return np.sqrt(np.sum(diff * diff, axis=-1))
+
+
+def construct_path(candidates, candidate_heuristic, candidate_pheromone, features, alpha, beta, default_pheromone):
+    """Build one ant's path, only looking at the candidate list of the current node.
+
+    The full set of unvisited nodes is only considered when every candidate has
+    already been visited. Edges outside the candidate lists carry default_pheromone.
+    candidate_heuristic is (1 / d) ** beta for the candidate edges.
+    """
+    num_points = len(candidates)
+    start = np.random.randint(num_points)
+    path = [start]
+    visited = np.zeros(num_points, dtype=bool)
+    visited[start] = True
+    current = start
+    for _ in range(num_points - 1):
+        open_candidates = ~visited[candidates[current]]
+        if open_candidates.any():
+            row = candidate_pheromone[current] ** alpha * candidate_heuristic[current] * open_candidates
+            options = candidates[current]
+        else:
+            # Every candidate has been visited, fall back to all remaining nodes
+            options = np.flatnonzero(~visited)
+            dist = edge_distances(features, current, options)
+            row = default_pheromone ** alpha * (1.0 / (dist + 1e-10)) ** beta
+        cdf = np.cumsum(row)
+        current = options[min(np.searchsorted(cdf, np.random.random_sample() * cdf[-1], side='right'), len(options) - 1)]
+        path.append(current)
+        visited[current] = True
+    return path
+
+
+def deposit_pheromone(candidates, candidate_pheromone, path, amounts):
+    """Add amounts to the path's edges that are stored in the candidate lists."""
+    path = np.asarray(path)
+    origins, targets = path[:-1], path[1:]
+    rows, cols = np.nonzero(candidates[origins] == targets[:, None])
+    np.add.at(candidate_pheromone, (origins[rows], cols), np.asarray(amounts)[rows])
@@ -0,0 +1,184 @@
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+BACKENDS = ('numpy', 'numba', 'auto')
+
+prange = range if numba is None else numba.prange
+
+
+def jit(parallel=False):
+    """numba.njit with on-disk caching of the compiled code, or the plain function without Numba.
+
+    Compilation happens on the first call; with cache=True later processes load
+    the machine code from __pycache__ instead of compiling again.
+    """
+    def decorate(function):
+        if numba is None:
+            return function
+        return numba.njit(parallel=parallel, cache=True, error_model='numpy')(function)
+    return decorate
+
+
+def resolve_backend(backend):
+    """'numpy' or 'numba' for a backend setting; 'auto' picks Numba when it is installed."""
+    if backend not in BACKENDS:
+        raise ValueError(f"backend must be one of {BACKENDS}")
+    if backend == 'auto':
+        return 'numpy' if numba is None else 'numba'
+    if backend == 'numba' and numba is None:
+        raise ImportError("backend='numba' needs the numba package; use backend='auto' to fall back to NumPy")
+    return backend
+
+
+def draw_random_numbers(num_ants, num_points):
+    """Every ant's start node and step draws from np.random, in the order the scalar construction uses them."""
+    starts = np.empty(num_ants, dtype=np.int64)
+    draws = np.empty((num_ants, num_points - 1))
+    for ant in range(num_ants):
+        starts[ant] = np.random.randint(num_points)
+        draws[ant] = np.random.random_sample(num_points - 1)
+    return starts, draws
+
+
+def check_weights(rows, totals):
+    """Raise the ValueError np.random.choice would for roulette rows it cannot normalise.
+
+    A zero distance deposits infinite pheromone, which turns the weights into NaN
+    or infinity, and pheromone can underflow until every open edge weighs zero.
+    """
+    if not np.all(np.isfinite(totals) & (totals > 0)):
+        raise ValueError("probabilities contain NaN")
+    if np.any(rows < 0):
+        raise ValueError("probabilities are not non-negative")
+
+
+# Codes of roulette rows the kernels cannot normalise; exceptions cannot leave a prange loop,
+# so the ants record them and raise_weight_error raises once the loop is done
+WEIGHTS_OK, WEIGHTS_NAN, WEIGHTS_NEGATIVE = 0, 1, 2
+
+
+@jit()
+def weight_error(weights, total):
+    """check_weights for one row inside the kernels, as one of the codes above."""
+    if not (total > 0.0 and total < np.inf):
+        return WEIGHTS_NAN
+    for j in range(len(weights)):
+        if weights[j] < 0:
+            return WEIGHTS_NEGATIVE
+    return WEIGHTS_OK
+
+
+@jit()
+def raise_weight_error(errors):
+    """Raise the ValueError check_weights would for the worst code any ant recorded."""
+    if np.any(errors == WEIGHTS_NAN):
+        raise ValueError("probabilities contain NaN")
+    if np.any(errors == WEIGHTS_NEGATIVE):
+        raise ValueError("probabilities are not non-negative")
+
+
+@jit()
+def roulette(weights, target):
+    """First index at which the running sum of weights exceeds target (the np.random.choice rule).
+
+    The weights have to pass weight_error first; without a positive weight no index is found.
+    """
+    total = 0.0
+    last = -1
+    for j in range(len(weights)):
+        if weights[j] > 0:
+            total += weights[j]
+            last = j
+            if total > target:
+                return j
+    # Rounding can leave target at the very end of the wheel
+    return last
+
+
+@jit(parallel=True)
+def construct_paths(pheromone_alpha, heuristic, starts, draws):
+    """Build one path per ant from pheromone ** alpha and the heuristic matrix, ants in parallel.
+
+    starts holds each ant's first node and draws its (num_points - 1) uniform
+    numbers, so the paths only depend on the random numbers drawn beforehand.
+    """
+    num_ants = len(starts)
+    num_points = len(heuristic)
+    paths = np.empty((num_ants, num_points), dtype=np.int64)
+    errors = np.zeros(num_ants, dtype=np.int64)
+    for ant in prange(num_ants):
+        visited = np.zeros(num_points, dtype=np.bool_)
+        weights = np.empty(num_points)
+        current = starts[ant]
+        paths[ant, 0] = current
+        visited[current] = True
+        for step in range(1, num_points):
+            total = 0.0
+            for j in range(num_points):
+                weights[j] = 0.0 if visited[j] else pheromone_alpha[current, j] * heuristic[current, j]
+                total += weights[j]
+            errors[ant] = weight_error(weights, total)
+            if errors[ant] != WEIGHTS_OK:
+                break
+            current = roulette(weights, draws[ant, step - 1] * total)
+            paths[ant, step] = current
+            visited[current] = True
+    raise_weight_error(errors)
+    return paths
+
+
+@jit(parallel=True)
+def construct_paths_from_matrices(pheromone, distance, alpha, beta, starts, draws):
+    """construct_paths for on-disk matrices: the weights are computed from the rows at every step."""
+    num_ants = len(starts)
+    num_points = len(distance)
+    paths = np.empty((num_ants, num_points), dtype=np.int64)
+    errors = np.zeros(num_ants, dtype=np.int64)
+    for ant in prange(num_ants):
+        visited = np.zeros(num_points, dtype=np.bool_)
+        weights = np.empty(num_points)
+        current = starts[ant]
+        paths[ant, 0] = current
+        visited[current] = True
+        for step in range(1, num_points):
+            total = 0.0
+            for j in range(num_points):
+                if visited[j]:
+                    weights[j] = 0.0
+                else:
+                    weights[j] = pheromone[current, j] ** alpha * (1.0 / (distance[current, j] + 1e-10)) ** beta
+                total += weights[j]
+            errors[ant] = weight_error(weights, total)
+            if errors[ant] != WEIGHTS_OK:
+                break
+            current = roulette(weights, draws[ant, step - 1] * total)
+            paths[ant, step] = current
+            visited[current] = True
+    raise_weight_error(errors)
+    return paths
+
+
+@jit(parallel=True)
+def path_costs(distance, paths):
+    """Total distance of every row of paths, summed along the path in the matrix dtype."""
+    costs = np.zeros(len(paths), dtype=distance.dtype)
+    for ant in prange(len(paths)):
+        for step in range(paths.shape[1] - 1):
+            costs[ant] += distance[paths[ant, step], paths[ant, step + 1]]
+    return costs
+
+
+@jit()
+def deposit_pheromone(pheromone, distance, paths, scale):
+    """Add 1 / distance / scale to every edge of every path.
+
+    Ants run one after another because their paths can share edges.
+    """
+    for ant in range(len(paths)):
+        for step in range(paths.shape[1] - 1):
+            origin, target = paths[ant, step], paths[ant, step + 1]
+            pheromone[origin, target] += 1.0 / distance[origin, target] / scale
@@ -0,0 +1,106 @@
+import numpy as np
+
+from Correlation_Module.correlations import CORRELATION_MODELS, mean_absolute_error, valid_points
+
+
+class ContinuousAntColony:
+    """Ant colony optimisation for continuous variables (ACO_R).
+
+    The colony keeps an archive of the archive_size best solutions found so far.
+    Each ant picks an archive solution with a rank-based Gaussian weight (q controls
+    how strongly the best ranks are preferred) and samples every variable from a
+    normal distribution centred on it, whose width is xi times the mean distance to
+    the other archive solutions in that variable. Samples are clipped to bounds.
+
+    objective takes a (num_ants, num_variables) array and returns one error per row.
+    """
+
+    def __init__(self, objective, bounds, num_ants=20, num_iterations=1000, archive_size=50, q=0.1, xi=0.85,
+                 seed=None, stopping=None):
+        self.objective = objective
+        self.bounds = np.asarray(bounds, dtype=float)
+        self.num_ants = num_ants
+        self.num_iterations = num_iterations
+        self.archive_size = archive_size
+        self.q = q
+        self.xi = xi
+        self.rng = np.random.default_rng(seed)
+        self.stopping = stopping
+        self.stop_reason = None
+        self.iterations_run = 0
+        self.evaluations = 0
+        self.best_solution = None
+        self.best_error = np.inf
+        self.history = []
+
+        ranks = np.arange(archive_size)
+        weights = np.exp(-ranks ** 2 / (2 * (q * archive_size) ** 2)) / (q * archive_size * np.sqrt(2 * np.pi))
+        self.selection_probs = weights / weights.sum()
+
+    def evaluate(self, solutions):
+        self.evaluations += len(solutions)
+        errors = np.asarray(self.objective(solutions), dtype=float)
+        return np.where(np.isnan(errors), np.inf, errors)
+
+    def initialize_archive(self):
+        low, high = self.bounds[:, 0], self.bounds[:, 1]
+        self.archive = self.rng.uniform(low, high, size=(self.archive_size, len(self.bounds)))
+        self.archive_errors = self.evaluate(self.archive)
+        self.sort_archive()
+
+    def sort_archive(self):
+        order = np.argsort(self.archive_errors, kind='stable')
+        self.archive = self.archive[order]
+        self.archive_errors = self.archive_errors[order]
+
+    def sample_solutions(self):
+        # Every ant picks a guiding solution, then samples around it one variable at a time
+        guides = self.rng.choice(self.archive_size, size=self.num_ants, p=self.selection_probs)
+        spread = np.abs(self.archive[None, :, :] - self.archive[guides, None, :]).sum(axis=1)
+        sigma = self.xi * spread / (self.archive_size - 1)
+        samples = self.rng.normal(self.archive[guides], sigma)
+        return np.clip(samples, self.bounds[:, 0], self.bounds[:, 1])
+
+    def run(self):
+        self.initialize_archive()
+        if self.stopping is not None:
+            self.stopping.reset()
+        self.stop_reason = 'max_iterations'
+        for iteration in range(1, self.num_iterations + 1):
+            solutions = self.sample_solutions()
+            errors = self.evaluate(solutions)
+            # Keep the archive_size best of the old archive and the new solutions
+            self.archive = np.vstack([self.archive, solutions])
+            self.archive_errors = np.concatenate([self.archive_errors, errors])
+            self.sort_archive()
+            self.archive = self.archive[:self.archive_size]
+            self.archive_errors = self.archive_errors[:self.archive_size]
+
+            self.best_solution = self.archive[0].copy()
+            self.best_error = self.archive_errors[0]
+            self.history.append(self.best_error)
+            self.iterations_run = iteration
+            if self.stopping is not None:
+                reason = self.stopping.check(iteration, self.best_error)
+                if reason is not None:
+                    self.stop_reason = reason
+                    break
+        return self.best_solution, self.best_error
+
+
+def fit_correlation(model, Pb_data, Tb_data, GOR_data, gamma_g, API, bounds=None, **kwargs):
+    """Fit the coefficients of a correlation model ('glaso' or 'standing') by minimising the MAE.
+
+    Extra keyword arguments go to ContinuousAntColony. Returns the best coefficients,
+    their MAE and the colony (for history, evaluations and stop reason).
+    """
+    spec = CORRELATION_MODELS[model]
+    valid = valid_points(Pb_data, Tb_data)
+
+    def objective(coefficients):
+        Rs = spec['correlation'](coefficients, Pb_data, Tb_data, gamma_g, API)
+        return mean_absolute_error(Rs, GOR_data, valid)
+
+    colony = ContinuousAntColony(objective, spec['bounds'] if bounds is None else bounds, **kwargs)
+    best_solution, best_error = colony.run()
+    return best_solution, best_error, colony
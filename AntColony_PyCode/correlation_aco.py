@@ -0,0 +1,192 @@
+import random
+
+import numpy as np
+
+from AntColony_PyCode import matrix_storage
+from AntColony_PyCode.distance_matrix import pairwise_distances
+from pvt_Data.pvt_dataset import column_array, column_values
+
+# Parameters that make up the correlation-weighted distance, in order
+PARAMETERS = ['bubble_point_pressure', 'api_gravity', 'gas_gravity', 'reservoir_temperature']
+
+# A column whose range is within this fraction of its magnitude counts as constant
+CONSTANT_TOLERANCE = 1e-9
+
+
+def constant_columns(pvt_data):
+    """The PARAMETERS that are constant in the data, up to rounding noise.
+
+    Their correlation with actual_gor is undefined, or a meaningless value computed
+    from the noise, so the correlation-weighted distance cannot be built from them.
+    """
+    constant = []
+    for name in PARAMETERS:
+        values = column_values(pvt_data, name)
+        if np.ptp(values) <= CONSTANT_TOLERANCE * max(1.0, float(np.max(np.abs(values)))):
+            constant.append(name)
+    return constant
+
+
+class AntColonyOptimization:
+    """ACO over PVT records with the correlation-weighted distance of Main-Script/test.py.
+
+    The distance between two records is the L1 distance of their PARAMETERS, each
+    weighted by its correlation with actual_gor. Ants choose the next record with
+    probability proportional to pheromone ** alpha * (1 / (1 + distance)) ** beta
+    and deposit 1 / cost on every edge of their path. All ants of an iteration are
+    built together; the random numbers are drawn in the same order as the original
+    one-ant-at-a-time loop, so seeded np.random and random give the same paths.
+    """
+
+    def __init__(self, pvt_data, num_ants=20, num_iterations=100, decay=0.95, alpha=1.0, beta=2.0,
+                 lazy_evaporation=False, stopping=None):
+        self.pvt_data = pvt_data  # PVT data for the optimization
+        self.num_ants = num_ants  # Number of ants to simulate
+        self.num_iterations = num_iterations  # Number of iterations to run the algorithm
+        self.decay = decay  # Decay factor for pheromone evaporation
+        self.alpha = alpha  # Importance of pheromone
+        self.beta = beta  # Importance of distance (heuristic)
+        self.num_nodes = len(pvt_data)  # Number of nodes (data points) to optimize
+
+        # Initialize pheromones on all edges
+        self.pheromone = np.ones((self.num_nodes, self.num_nodes))  # Initially, equal pheromone on all paths
+        self.lazy_evaporation = lazy_evaporation  # Track evaporation as a scalar instead of rescaling the matrix
+        self.pheromone_scale = 1.0  # Real pheromone is self.pheromone * self.pheromone_scale
+        self.stopping = stopping  # Optional StoppingCriteria for ending the run early
+        self.stop_reason = None  # Criterion that ended the last run
+        self.iterations_run = 0  # Iterations completed by the last run
+        self.distances = self.calculate_distances()  # Distance matrix (to be used as heuristics)
+        self.heuristic = (1 / (1 + self.distances)) ** self.beta  # Only depends on the distances, so computed once
+
+    def calculate_correlations(self):
+        """Calculate the correlation of each parameter with actual GOR."""
+        gor_values = column_values(self.pvt_data, 'actual_gor')
+        return {name: np.corrcoef(column_values(self.pvt_data, name), gor_values)[0, 1] for name in PARAMETERS}
+
+    def calculate_distances(self):
+        """Calculate the distance between all nodes (PVT data points) based on weighted correlations."""
+        # A constant column has no correlation, and its NaN (or noise) weight would make the distances meaningless
+        undefined = constant_columns(self.pvt_data)
+        if undefined:
+            raise ValueError(f"The correlation of {undefined} with actual_gor is undefined (constant column)")
+        correlations = self.calculate_correlations()
+        features = column_array(self.pvt_data, PARAMETERS)
+        weights = [correlations[name] for name in PARAMETERS]
+        return pairwise_distances(features, metric='l1', weights=weights)
+
+    def run(self):
+        """Run the ACO algorithm to find the best path (optimized GOR prediction)."""
+        best_path = None
+        best_cost = float('inf')
+        if self.stopping is not None:
+            self.stopping.reset()
+        self.stop_reason = 'max_iterations'
+
+        for iteration in range(1, self.num_iterations + 1):
+            all_paths = self.construct_paths()
+            all_costs = self.evaluate_paths(all_paths)
+
+            # argmin picks the first of equally short paths, like the loop over the ants did
+            ant = int(np.argmin(all_costs))
+            if all_costs[ant] < best_cost:
+                best_cost = float(all_costs[ant])
+                best_path = all_paths[ant]
+
+            self.update_pheromones(all_paths, all_costs)
+
+            self.iterations_run = iteration
+            if self.stopping is not None:
+                reason = self.stopping.check(iteration, best_cost, self.pheromone)
+                if reason is not None:
+                    self.stop_reason = reason
+                    break
+
+        return best_path, best_cost
+
+    def construct_paths(self):
+        """Construct every ant's path at once, one vectorized step per node."""
+        starts = np.array([random.randint(0, self.num_nodes - 1) for _ in range(self.num_ants)], dtype=int)
+        # np.random.choice uses one uniform number per step, drawn here in the order the ants would draw them
+        draws = np.random.random_sample((self.num_ants, self.num_nodes - 1))
+        weights = self.pheromone ** self.alpha * self.heuristic
+
+        ants = np.arange(self.num_ants)
+        paths = np.empty((self.num_ants, self.num_nodes), dtype=int)
+        paths[:, 0] = starts
+        visited = np.zeros((self.num_ants, self.num_nodes), dtype=bool)
+        visited[ants, starts] = True
+        current = starts
+        for step in range(1, self.num_nodes):
+            rows = np.where(visited, 0.0, weights[current])
+            # Negatively correlated parameters can give negative distances and weights, which np.random.choice rejects
+            if np.any(rows < 0):
+                raise ValueError("probabilities are not non-negative")
+            cdf = np.cumsum(rows / np.sum(rows, axis=1, keepdims=True), axis=1)
+            cdf /= cdf[:, -1:]
+            # Every unvisited edge's pheromone can underflow to zero over a long run
+            if np.any(np.isnan(cdf[:, -1])):
+                raise ValueError("probabilities contain NaN")
+            # Same rule as np.random.choice: first node whose cumulative probability exceeds the draw
+            current = np.sum(cdf <= draws[:, step - 1, None], axis=1)
+            paths[:, step] = current
+            visited[ants, current] = True
+        return paths
+
+    def construct_path(self):
+        """Construct the path of a single ant."""
+        path = np.empty(self.num_nodes, dtype=int)
+        visited = np.zeros(self.num_nodes, dtype=bool)
+        path[0] = random.randint(0, self.num_nodes - 1)  # Start from a random node
+        visited[path[0]] = True
+        for step in range(1, self.num_nodes):
+            path[step] = self.select_next_node(path[step - 1], visited)
+            visited[path[step]] = True
+        return path
+
+    def select_next_node(self, current_node, visited):
+        """Select the next node from the pheromone levels and distances; visited is a boolean mask over the nodes."""
+        row = np.where(visited, 0.0, self.pheromone[current_node] ** self.alpha * self.heuristic[current_node])
+        return np.random.choice(self.num_nodes, p=row / np.sum(row))
+
+    def evaluate_paths(self, paths):
+        """Cost (total distance) of each row of a 2-D array of paths."""
+        paths = np.asarray(paths)
+        if paths.shape[1] < 2:
+            return np.zeros(len(paths))
+        # Summed in path order, like the original loop, so the costs match it to the last bit
+        return np.cumsum(self.distances[paths[:, :-1], paths[:, 1:]], axis=1)[:, -1]
+
+    def evaluate_path(self, path):
+        """Evaluate the cost (total distance) of a single path."""
+        return self.evaluate_paths(np.asarray(path)[None])[0]
+
+    def update_pheromones(self, all_paths, all_costs):
+        """Update pheromones based on the paths explored by ants."""
+        if self.lazy_evaporation:
+            self.pheromone_scale *= 1 - self.decay
+            if self.pheromone_scale < matrix_storage.RENORMALIZE_BELOW:
+                self.pheromone_scale = matrix_storage.renormalize(self.pheromone, self.pheromone_scale)
+        else:
+            self.pheromone *= 1 - self.decay
+
+        for path, cost in zip(all_paths, all_costs):
+            path = np.asarray(path)
+            np.add.at(self.pheromone, (path[:-1], path[1:]), 1 / cost / self.pheromone_scale)
+
+
+def predict_gor_with_aco(pvt_data, bubble_point_pressure, api_gravity, gas_gravity, reservoir_temperature,
+                         num_ants=50, num_iterations=500, decay=0.9, alpha=2.0, beta=1.0):
+    """Predict the GOR of a query as the inverse-distance weighted GOR of the records along the best path."""
+    aco = AntColonyOptimization(pvt_data, num_ants=num_ants, num_iterations=num_iterations, decay=decay, alpha=alpha,
+                                beta=beta)
+    shortest_path, _ = aco.run()
+
+    optimized_gor_values = column_values(pvt_data, 'actual_gor')[shortest_path]
+
+    query = np.array([bubble_point_pressure, api_gravity, gas_gravity, reservoir_temperature])
+    distance = np.abs(column_array(pvt_data, PARAMETERS)[shortest_path] - query).sum(axis=1)
+    weights = 1 / (1 + distance)
+
+    normalized_weights = weights / weights.sum()
+
+    return float(np.sum(optimized_gor_values * normalized_weights))
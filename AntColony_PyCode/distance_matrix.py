@@ -0,0 +1,66 @@
+import numpy as np
+
+from AntColony_PyCode.candidate_list import as_feature_array
+
+
+def standardize_features(features):
+    """Scale every column to zero mean and unit variance (constant columns are left at zero)."""
+    features = as_feature_array(features)
+    std = features.std(axis=0)
+    std[std == 0] = 1.0
+    return (features - features.mean(axis=0)) / std
+
+
+def block_rows(num_points, itemsize, memory_budget):
+    """Number of matrix rows that fit in memory_budget bytes of scratch space."""
+    return int(max(1, min(num_points, memory_budget // max(1, num_points * itemsize))))
+
+
+def pairwise_distances(features, metric='euclidean', weights=None, dtype=np.float64, standardize=False,
+                       memory_budget=64 * 2**20, out=None):
+    """Build the n x n distance matrix between the rows of features.
+
+    metric is 'euclidean' or 'l1'; weights optionally scales each feature column
+    (for example the correlation weights of the GOR distance). The matrix is filled
+    a block of rows at a time so the scratch space stays within memory_budget bytes,
+    and is written into out when given (any writable (n, n) array, e.g. a np.memmap).
+    """
+    features = standardize_features(features) if standardize else as_feature_array(features)
+    return cross_distances(features, features, metric, weights, dtype, memory_budget, out)
+
+
+def cross_distances(queries, features, metric='euclidean', weights=None, dtype=np.float64,
+                    memory_budget=64 * 2**20, out=None):
+    """Build the (m, n) matrix of distances from each row of queries to each row of features.
+
+    Arguments are as for pairwise_distances. Used on its own to add the rows and
+    columns of new points to an existing distance matrix.
+    """
+    if metric not in ('euclidean', 'l1'):
+        raise ValueError("metric must be 'euclidean' or 'l1'")
+    queries = as_feature_array(queries)
+    features = as_feature_array(features)
+    num_queries = len(queries)
+    num_points, num_features = features.shape
+    weights = np.ones(num_features) if weights is None else np.asarray(weights, dtype=float)
+    if out is None:
+        out = np.empty((num_queries, num_points), dtype=dtype)
+
+    # Keep each feature column contiguous for the row blocks below
+    query_columns = np.ascontiguousarray(queries.T)
+    columns = np.ascontiguousarray(features.T)
+    step = block_rows(num_points, np.dtype(np.float64).itemsize * 2, memory_budget)
+    for start in range(0, num_queries, step):
+        stop = min(start + step, num_queries)
+        block = np.zeros((stop - start, num_points))
+        for query_column, column, weight in zip(query_columns, columns, weights):
+            diff = np.abs(query_column[start:stop, None] - column[None, :])
+            if metric == 'euclidean':
+                diff *= diff
+            if weight != 1:
+                diff *= weight
+            block += diff
+        if metric == 'euclidean':
+            np.sqrt(block, out=block)
+        out[start:stop] = block
+    return out
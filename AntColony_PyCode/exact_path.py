@@ -0,0 +1,50 @@
+import numpy as np
+
+from AntColony_PyCode.candidate_list import as_feature_array
+
+SOLVERS = ('colony', 'exact', 'auto')
+
+
+def sorted_path(features, metric='l1'):
+    """The exact shortest open path through the points when sorting finds it, else None.
+
+    With a single varying feature the points sorted by it form the shortest path
+    (for either metric), at a cost of the feature's range. With several features
+    and the L1 metric the same holds when every feature is monotone along one
+    ordering: each feature then contributes exactly its range, which is a lower
+    bound for any path. Constant features are ignored. Returns (path, cost) with
+    path an index array, found in O(n log n).
+    """
+    features = as_feature_array(features)
+    varying = features[:, np.ptp(features, axis=0) > 0] if len(features) else features
+    if varying.shape[1] == 0:
+        return np.arange(len(features)), 0.0
+    if varying.shape[1] > 1 and metric != 'l1':
+        return None
+    # Sort by the first feature, breaking ties with the others
+    path = np.lexsort(varying.T[::-1])
+    steps = np.diff(varying[path], axis=0)
+    if not np.all((steps >= 0).all(axis=0) | (steps <= 0).all(axis=0)):
+        return None
+    if metric == 'l1':
+        cost = float(np.abs(steps).sum())
+    else:
+        cost = float(np.sqrt((steps * steps).sum(axis=1)).sum())
+    return path, cost
+
+
+def resolve_solver(solver, features, metric):
+    """The exact (path, cost) when the solver should use it, or None to run the colony.
+
+    'colony' always runs the colony, 'exact' requires the sorted path to be exact
+    and 'auto' uses it whenever it is.
+    """
+    if solver not in SOLVERS:
+        raise ValueError(f"solver must be one of {SOLVERS}")
+    if solver == 'colony':
+        return None
+    solution = sorted_path(features, metric)
+    if solution is None and solver == 'exact':
+        raise ValueError("The distance is neither one-dimensional nor separable, so there is no exact sorted path; "
+                         "use solver='colony' or 'auto'")
+    return solution
@@ -0,0 +1,90 @@
+import numpy as np
+
+from AntColony_PyCode.ant_colony_optimization import AntColonyOptimization
+from AntColony_PyCode.result_cache import data_fingerprint, run_cached
+from pvt_Data.pvt_dataset import column_array, column_values
+
+# Input parameters of a GOR query, in the column order used by predict()
+PARAMETERS = ['bubble_point_pressure', 'api_gravity', 'gas_gravity', 'reservoir_temperature']
+
+# Fitted predictors kept for the life of the process, see get_predictor()
+_fitted_predictors = {}
+
+
+class ACOGORPredictor:
+    """GOR predictor that runs the ant colony once per dataset.
+
+    fit() runs AntColonyOptimization on the PVT records and stores the tour with
+    the GOR values and parameters of its points. predict() then answers any number
+    of (Pb, API, gas gravity, T) queries with the inverse-distance weighted average
+    of the GOR values along the tour, without running the colony again. With a
+    ResultCache, fit() loads the tour of an earlier identical run from disk.
+    The bubble point distance is one-dimensional, so the default solver='auto'
+    returns the exact pressure-sorted tour without any colony iterations.
+    """
+
+    def __init__(self, num_ants=20, num_iterations=200, decay=0.95, alpha=1.0, beta=2.0, solver='auto', cache=None,
+                 **colony_kwargs):
+        self.params = {'num_ants': num_ants, 'num_iterations': num_iterations, 'decay': decay,
+                       'alpha': alpha, 'beta': beta, 'solver': solver, **colony_kwargs}
+        self.cache = cache
+        self.shortest_path = None
+        self.shortest_cost = None
+        self.features = None
+        self.gor_values = None
+
+    def fit(self, pvt_data):
+        if self.cache is not None:
+            result = run_cached(pvt_data, self.cache, **self.params)
+            self.set_path(pvt_data, result['shortest_path'], result['shortest_cost'])
+            return self
+        aco = AntColonyOptimization(pvt_data, **self.params)
+        shortest_path, shortest_cost = aco.run()
+        self.set_path(pvt_data, shortest_path, shortest_cost)
+        return self
+
+    def set_path(self, pvt_data, shortest_path, shortest_cost):
+        self.shortest_path = np.asarray(shortest_path)
+        self.shortest_cost = shortest_cost
+        # Parameters and GOR of the points in tour order
+        self.features = column_array(pvt_data, PARAMETERS)[self.shortest_path]
+        self.gor_values = column_values(pvt_data, 'actual_gor')[self.shortest_path]
+
+    def predict(self, X, memory_budget=64 * 2**20):
+        """Predict GOR for an (m, 4) array of (Pb, API, gas gravity, T) rows; returns an (m,) array.
+
+        The queries are answered a block of rows at a time, with the block size chosen
+        so the distances to the tour and one feature column's differences stay within
+        memory_budget bytes, like distance_matrix.cross_distances.
+        """
+        if self.features is None:
+            raise ValueError("The predictor has to be fitted before predict() is called")
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        num_points = len(self.features)
+        columns = np.ascontiguousarray(self.features.T)
+        step = int(max(1, memory_budget // max(1, num_points * np.dtype(np.float64).itemsize * 2)))
+        predictions = np.empty(len(X))
+        for start in range(0, len(X), step):
+            rows = X[start:start + step]
+            # L1 distance accumulated one feature column at a time
+            weights = np.zeros((len(rows), num_points))
+            for query_column, column in zip(rows.T, columns):
+                weights += np.abs(query_column[:, None] - column[None, :])
+            weights += 1.0
+            np.reciprocal(weights, out=weights)  # Weight inversely proportional to distance
+            predictions[start:start + step] = weights @ self.gor_values / weights.sum(axis=1)
+        return predictions
+
+    def predict_one(self, bubble_point_pressure, api_gravity, gas_gravity, reservoir_temperature):
+        return float(self.predict([[bubble_point_pressure, api_gravity, gas_gravity, reservoir_temperature]])[0])
+
+
+def get_predictor(pvt_data, cache=None, **params):
+    """Return a fitted ACOGORPredictor for the data, fitting it only the first time it is asked for.
+
+    cache is an optional ResultCache that keeps the fitted tour across processes.
+    """
+    key = (data_fingerprint(pvt_data), tuple(sorted(params.items())))
+    if key not in _fitted_predictors:
+        _fitted_predictors[key] = ACOGORPredictor(cache=cache, **params).fit(pvt_data)
+    return _fitted_predictors[key]
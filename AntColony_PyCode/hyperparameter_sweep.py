@@ -0,0 +1,283 @@
+import csv
+import hashlib
+import itertools
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from AntColony_PyCode import correlation_aco
+from AntColony_PyCode.ant_colony_optimization import AntColonyOptimization
+from AntColony_PyCode.continuous_aco import fit_correlation
+from AntColony_PyCode.result_cache import DEFAULT_CACHE_DIR, data_fingerprint
+from pvt_Data.pvt_dataset import column_values
+
+
+def run_colony(data, params, seed):
+    """Shortest path cost of AntColonyOptimization (main.py's colony) on the PVT records."""
+    np.random.seed(seed)
+    _, cost = AntColonyOptimization(data, seed=seed, **params).run()
+    return cost
+
+
+def run_correlation_colony(data, params, seed):
+    """Shortest path cost of the correlation-weighted colony (test.py's colony)."""
+    np.random.seed(seed)
+    random.seed(seed)
+    _, cost = correlation_aco.AntColonyOptimization(data, **params).run()
+    return cost
+
+
+def check_correlation_colony(data):
+    """Raise ValueError when the correlation-weighted distance cannot be built from data."""
+    constant = correlation_aco.constant_columns(data)
+    if constant:
+        raise ValueError(f"The correlation colony cannot run on this data: {constant} are constant, so their "
+                         f"correlation with actual_gor is undefined; use data in which they vary")
+
+
+def run_correlation_fit(model, data, params, seed):
+    """MAE of a Glaso or Standing fit by ContinuousAntColony on the PVT records (temperatures in F)."""
+    Pb = column_values(data, 'bubble_point_pressure')
+    Tb = column_values(data, 'reservoir_temperature') + 460
+    gor = column_values(data, 'actual_gor')
+    gamma_g = column_values(data, 'gas_gravity')
+    API = column_values(data, 'api_gravity')
+    _, error, _ = fit_correlation(model, Pb, Tb, gor, gamma_g, API, seed=seed, **params)
+    return error
+
+
+# What can be swept. 'run' takes (data, params, seed) and returns the cost to minimise; the
+# budget of a trial is always num_iterations. 'check', when set, raises ValueError for data
+# every trial would fail on, before the sweep starts. In a space a list is a set of choices
+# and a (low, high) tuple a range: integers when both ends are ints, log-uniform as
+# (low, high, 'log').
+TARGETS = {
+    'colony': {
+        'run': run_colony,
+        'space': {'num_ants': (5, 50), 'alpha': (0.5, 3.0), 'beta': (0.5, 5.0), 'decay': (0.8, 0.99)},
+        'check': None,
+        'num_iterations': 200,
+    },
+    'correlation_colony': {
+        'run': run_correlation_colony,
+        'space': {'num_ants': (5, 50), 'alpha': (0.5, 3.0), 'beta': (0.5, 5.0), 'decay': (0.5, 0.99)},
+        'check': check_correlation_colony,
+        'num_iterations': 500,
+    },
+    'glaso': {
+        'run': lambda data, params, seed: run_correlation_fit('glaso', data, params, seed),
+        'space': {'num_ants': (10, 60), 'archive_size': (10, 100), 'q': (0.01, 0.5, 'log'), 'xi': (0.3, 1.0)},
+        'check': None,
+        'num_iterations': 2000,
+    },
+    'standing': {
+        'run': lambda data, params, seed: run_correlation_fit('standing', data, params, seed),
+        'space': {'num_ants': (10, 60), 'archive_size': (10, 100), 'q': (0.01, 0.5, 'log'), 'xi': (0.3, 1.0)},
+        'check': None,
+        'num_iterations': 2000,
+    },
+}
+
+
+def _scale(spec, u):
+    """Map u in [0, 1) onto one dimension of a search space."""
+    if isinstance(spec, list):
+        return spec[min(int(u * len(spec)), len(spec) - 1)]
+    low, high = spec[0], spec[1]
+    if len(spec) > 2 and spec[2] == 'log':
+        return float(math.exp(math.log(low) + u * (math.log(high) - math.log(low))))
+    if isinstance(low, int) and isinstance(high, int):
+        return min(low + int(u * (high - low + 1)), high)
+    return float(low + u * (high - low))
+
+
+def grid_search(space, num_trials=None, rng=None):
+    """Every combination of the choices; ranges cannot be part of a grid."""
+    ranges = [name for name, spec in space.items() if not isinstance(spec, list)]
+    if ranges:
+        raise ValueError(f"A grid needs a list of choices for every parameter, {ranges} are ranges")
+    return [dict(zip(space, values)) for values in itertools.product(*space.values())]
+
+
+def random_search(space, num_trials, rng):
+    """num_trials independent uniform draws from the space."""
+    return [{name: _scale(spec, rng.random()) for name, spec in space.items()} for _ in range(num_trials)]
+
+
+def latin_hypercube(space, num_trials, rng):
+    """num_trials draws that hit every one of num_trials equal strata of each parameter once."""
+    strata = {name: (rng.permutation(num_trials) + rng.random(num_trials)) / num_trials for name in space}
+    return [{name: _scale(spec, strata[name][trial]) for name, spec in space.items()} for trial in range(num_trials)]
+
+
+SAMPLERS = {'grid': grid_search, 'random': random_search, 'lhs': latin_hypercube}
+
+
+class TrialCache:
+    """Cost and runtime of finished trials, one JSON file per target, data, parameters, seed and budget."""
+
+    def __init__(self, cache_dir=os.path.join(DEFAULT_CACHE_DIR, 'sweeps')):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.json')
+
+    def load(self, key):
+        try:
+            with open(self.path(key)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, key, result):
+        temporary = self.path(key) + '.tmp'
+        with open(temporary, 'w') as f:
+            json.dump(result, f)
+        os.replace(temporary, self.path(key))
+
+
+def trial_key(target, data_key, params, seed, num_iterations):
+    description = {'target': target, 'data': data_key, 'params': params, 'seed': seed,
+                   'num_iterations': num_iterations}
+    return hashlib.sha256(json.dumps(description, sort_keys=True, default=str).encode()).hexdigest()
+
+
+# Data of the sweep in a worker process, set once by the pool initializer
+_worker_data = None
+
+
+def _set_worker_data(data):
+    global _worker_data
+    _worker_data = data
+
+
+def _run_trial(target, params, seed, data=None):
+    data = _worker_data if data is None else data
+    start = time.perf_counter()
+    try:
+        cost = float(TARGETS[target]['run'](data, params, seed))
+    except Exception as error:  # A failing trial is ranked last instead of stopping the sweep
+        return {'cost': math.inf, 'runtime_s': time.perf_counter() - start, 'error': f"{type(error).__name__}: {error}"}
+    return {'cost': math.inf if math.isnan(cost) else cost, 'runtime_s': time.perf_counter() - start}
+
+
+def halving_budgets(num_iterations, min_iterations=None, eta=3):
+    """Iteration budgets of the successive-halving rungs, growing by eta up to num_iterations."""
+    if min_iterations is None or min_iterations >= num_iterations:
+        return [num_iterations]
+    budgets = []
+    budget = min_iterations
+    while budget < num_iterations:
+        budgets.append(budget)
+        budget *= eta
+    return budgets + [num_iterations]
+
+
+def pareto_front(rows):
+    """Flags of the rows no other row beats on both cost and runtime."""
+    return [not any(other['cost'] <= row['cost'] and other['runtime_s'] <= row['runtime_s']
+                    and (other['cost'] < row['cost'] or other['runtime_s'] < row['runtime_s']) for other in rows)
+            for row in rows]
+
+
+def write_leaderboard(rows, path):
+    param_names = sorted({name for row in rows for name in row['params']})
+    fields = ['rank', 'trial', 'num_iterations', 'cost', 'runtime_s', 'pareto', 'cached', 'error'] + param_names
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        for rank, row in enumerate(rows, start=1):
+            writer.writerow({'rank': rank, **{name: row.get(name, '') for name in fields[1:8]}, **row['params']})
+
+
+def run_sweep(target, data, space=None, sampler='lhs', num_trials=20, num_iterations=None, min_iterations=None,
+              eta=3, num_workers=None, seed=None, cache=None, leaderboard_path=None, **fixed_params):
+    """Search the hyperparameters of one of the TARGETS on data.
+
+    sampler ('grid', 'random' or 'lhs') draws num_trials settings from space (the
+    target's default space when None); fixed_params are passed to every trial.
+    Each trial gets its own seed from seed, so a seeded sweep is reproducible and
+    trials already in the cache (a TrialCache) are not run again.
+
+    With min_iterations the trials go through successive halving: all of them run
+    for min_iterations, the best 1 / eta are run again with eta times as many
+    iterations, and so on up to num_iterations. Trials run on num_workers
+    processes when num_workers > 1.
+
+    Returns a dict with the leaderboard (every trial at the largest budget it
+    reached, sorted by budget and then cost, with its runtime and whether it is on
+    the cost / runtime Pareto front of the trials run for num_iterations), the best
+    row and all trial records. The leaderboard is also written as CSV to
+    leaderboard_path when given.
+    """
+    if target not in TARGETS:
+        raise ValueError(f"Unknown target {target!r}, expected one of {list(TARGETS)}")
+    if sampler not in SAMPLERS:
+        raise ValueError(f"Unknown sampler {sampler!r}, expected one of {list(SAMPLERS)}")
+    space = TARGETS[target]['space'] if space is None else space
+    num_iterations = TARGETS[target]['num_iterations'] if num_iterations is None else num_iterations
+    cache = TrialCache() if cache is None else cache
+    if TARGETS[target]['check'] is not None:
+        TARGETS[target]['check'](data)
+
+    seed_sequence = np.random.SeedSequence(seed)
+    settings = SAMPLERS[sampler](space, num_trials, np.random.default_rng(seed_sequence))
+    trial_seeds = [int(child.generate_state(1)[0]) for child in seed_sequence.spawn(len(settings))]
+    params = [{**fixed_params, **setting} for setting in settings]
+    data_key = data_fingerprint(data)
+
+    executor = None
+    if num_workers and num_workers > 1:
+        executor = ProcessPoolExecutor(max_workers=num_workers, initializer=_set_worker_data, initargs=(data,))
+    records = []
+    budgets = halving_budgets(num_iterations, min_iterations, eta)
+    try:
+        survivors = list(range(len(params)))
+        for budget in budgets:
+            rung = {}
+            keys = {trial: trial_key(target, data_key, params[trial], trial_seeds[trial], budget)
+                    for trial in survivors}
+            pending = []
+            for trial in survivors:
+                result = cache.load(keys[trial])
+                if result is not None:
+                    rung[trial] = dict(result, cached=True)
+                else:
+                    pending.append(trial)
+            tasks = [(target, dict(params[trial], num_iterations=budget), trial_seeds[trial]) for trial in pending]
+            if executor is None:
+                results = [_run_trial(*task, data=data) for task in tasks]
+            else:
+                results = executor.map(_run_trial, *zip(*tasks)) if tasks else []
+            for trial, result in zip(pending, results):
+                if 'error' not in result:
+                    cache.save(keys[trial], result)
+                rung[trial] = dict(result, cached=False)
+            for trial in survivors:
+                records.append({'trial': trial, 'num_iterations': budget, 'params': params[trial], **rung[trial]})
+            # Keep the best 1 / eta for the next, longer rung
+            ranked = sorted(survivors, key=lambda trial: rung[trial]['cost'])
+            survivors = ranked[:max(1, math.ceil(len(ranked) / eta))]
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    final = {}
+    for record in records:
+        final[record['trial']] = record
+    leaderboard = sorted(final.values(), key=lambda row: (-row['num_iterations'], row['cost']))
+    # Costs at smaller budgets are not comparable, so the front only holds trials run at the full budget
+    finished = [row for row in leaderboard if row['num_iterations'] == budgets[-1]]
+    for row in leaderboard:
+        row['pareto'] = False
+    for row, pareto in zip(finished, pareto_front(finished)):
+        row['pareto'] = pareto
+    if leaderboard_path is not None:
+        write_leaderboard(leaderboard, leaderboard_path)
+    return {'best': leaderboard[0] if leaderboard else None, 'leaderboard': leaderboard, 'trials': records}
@@ -0,0 +1,125 @@
+import os
+
+import numpy as np
+
+from AntColony_PyCode import candidate_list, exact_path, matrix_storage
+from AntColony_PyCode.distance_matrix import cross_distances
+from pvt_Data.pvt_dataset import concat_rows
+
+
+def mean_blockwise(matrix, memory_budget=None):
+    total = 0.0
+    for start, stop in matrix_storage.row_blocks(matrix, memory_budget):
+        total += float(np.sum(matrix[start:stop], dtype=np.float64))
+    return total / matrix.size
+
+
+def grow_matrix(matrix, size, fill, storage_dir=None, name='matrix', memory_budget=None):
+    """A (size, size) copy of an (n, n) matrix whose new rows and columns hold fill.
+
+    The copy is made a block of rows at a time; with a storage directory it is a new
+    .npy memmap and the file of the old matrix is removed.
+    """
+    num_old = len(matrix)
+    grown = matrix_storage.allocate((size, size), matrix.dtype, storage_dir, f'{name}_{size}')
+    for start, stop in matrix_storage.row_blocks(grown, memory_budget):
+        grown[start:stop] = fill
+        if start < num_old:
+            grown[start:min(stop, num_old), :num_old] = matrix[start:min(stop, num_old)]
+    old_file = getattr(matrix, 'filename', None)
+    if old_file is not None and os.path.exists(old_file) and old_file != getattr(grown, 'filename', None):
+        os.remove(old_file)
+    return grown
+
+
+def insert_points(path, new_points, distance):
+    """Insert each new point into the path where it adds the least length (cheapest insertion).
+
+    distance(i, j) returns the distances between two equally long index arrays.
+    """
+    path = np.asarray(path, dtype=int)
+    for point in new_points:
+        to_point = distance(path, np.full(len(path), point))
+        # Extra length of inserting the point before the first node, between each pair, or after the last node
+        between = to_point[:-1] + to_point[1:] - distance(path[:-1], path[1:])
+        extra = np.concatenate([[to_point[0]], between, [to_point[-1]]])
+        position = int(np.argmin(extra))
+        path = np.insert(path, position, point)
+    return path
+
+
+def _carry_candidate_pheromone(old_candidates, old_pheromone, candidates, fill, block_size=4096):
+    """Pheromone on the new candidate lists: kept for edges that were candidates before, fill otherwise."""
+    pheromone = np.full(candidates.shape, fill)
+    for start in range(0, len(old_candidates), block_size):
+        stop = min(start + block_size, len(old_candidates))
+        same = candidates[start:stop, :, None] == old_candidates[start:stop, None, :]
+        found = same.any(axis=2)
+        kept = np.take_along_axis(old_pheromone[start:stop], same.argmax(axis=2), axis=1)
+        pheromone[start:stop][found] = kept[found]
+    return pheromone
+
+
+def add_points(colony, new_data, features, metric):
+    """Add records to a colony without rebuilding it, keeping what it has learned.
+
+    features(data) returns the distance features of a dataset and metric is the
+    colony's distance metric. Only the distances from the m new records to all
+    n + m records are computed. The pheromone of existing edges is kept and new
+    edges start at the current mean pheromone, so they are neither favoured nor
+    ruled out. The previous shortest path is extended by cheapest insertion of the
+    new records, so the next run() continues from it rather than from scratch.
+    Returns the colony.
+    """
+    num_old = len(colony.pvt_data)
+    data = concat_rows(colony.pvt_data, new_data)
+    size = len(data)
+    if size == num_old:
+        return colony
+    all_features = candidate_list.as_feature_array(features(data))
+
+    if colony.exact_solution is not None:
+        # Nothing was learned, so the exact path is simply found again
+        solution = exact_path.sorted_path(all_features, metric)
+        if solution is None:
+            raise ValueError("The new records make the sorted path inexact; build a new colony with "
+                             "solver='colony' instead")
+        colony.exact_solution = solution
+        colony.pvt_data = data
+        colony.shortest_path, colony.shortest_cost = solution
+        return colony
+
+    if colony.candidate_k is None:
+        storage_dir = colony.storage_dir or matrix_storage.resolve_storage_dir(
+            None, size, colony.distance_matrix.dtype.itemsize, colony.memory_budget, owner=colony)
+        level = mean_blockwise(colony.pheromone_matrix, colony.memory_budget)
+        distance = grow_matrix(colony.distance_matrix, size, 0, storage_dir, 'distance', colony.memory_budget)
+        cross_distances(all_features[num_old:], all_features, metric, dtype=distance.dtype,
+                        memory_budget=colony.memory_budget or matrix_storage.DEFAULT_BLOCK_BUDGET,
+                        out=distance[num_old:])
+        distance[:num_old, num_old:] = distance[num_old:, :num_old].T
+        colony.distance_matrix = distance
+        colony.pheromone_matrix = grow_matrix(colony.pheromone_matrix, size, level, storage_dir, 'pheromone',
+                                              colony.memory_budget)
+        colony.storage_dir = storage_dir
+        colony.heuristic_matrix = None
+
+        def edge_distance(i, j):
+            return colony.distance_matrix[i, j]
+    else:
+        level = float(np.mean(colony.candidate_pheromone)) if colony.candidate_pheromone.size else 1.0 / size
+        candidates, candidate_distances = candidate_list.nearest_neighbours(all_features, colony.candidate_k)
+        colony.candidate_pheromone = _carry_candidate_pheromone(colony.candidates, colony.candidate_pheromone,
+                                                                candidates, level)
+        colony.candidates, colony.candidate_distances = candidates, candidate_distances
+        colony.candidate_heuristic = (1.0 / (candidate_distances + 1e-10)) ** colony.beta
+        colony.features = all_features
+
+        def edge_distance(i, j):
+            return candidate_list.edge_distances(all_features, i, j)
+
+    colony.pvt_data = data
+    if colony.shortest_path is not None:
+        colony.shortest_path = insert_points(colony.shortest_path, range(num_old, size), edge_distance)
+        colony.shortest_cost = colony.calculate_path_cost(colony.shortest_path)
+    return colony
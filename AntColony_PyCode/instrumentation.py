@@ -0,0 +1,201 @@
+import collections
+import csv
+import json
+import time
+
+import numpy as np
+
+from AntColony_PyCode import candidate_list
+from AntColony_PyCode.stopping import pheromone_entropy
+
+# Fields of every record, in the order CSVSink writes them. Phase times are in
+# seconds; the pheromone fields are None when the tracer skips them.
+RECORD_FIELDS = ['iteration', 'elapsed_s', 'construction_s', 'local_search_s', 'pheromone_s', 'evaluation_s',
+                 'iteration_best_cost', 'mean_cost', 'best_cost', 'pheromone_entropy', 'branching_factor',
+                 'edge_diversity']
+
+
+def branching_factor(pheromone, lam=0.05, block_size=1024):
+    """Mean lambda-branching factor of the rows of a pheromone matrix.
+
+    A row's factor is the number of entries of at least min + lam * (max - min) of
+    that row. It falls towards 1 as the colony converges onto one successor per
+    node; like pheromone_entropy it does not depend on a global scale factor.
+    """
+    num_rows = len(pheromone)
+    if num_rows == 0:
+        return 0.0
+    total = 0
+    for start in range(0, num_rows, block_size):
+        rows = np.asarray(pheromone[start:start + block_size], dtype=float)
+        low, high = rows.min(axis=1, keepdims=True), rows.max(axis=1, keepdims=True)
+        total += np.count_nonzero(rows >= low + lam * (high - low))
+    return total / num_rows
+
+
+def edge_diversity(ants_paths):
+    """Fraction of distinct edges among all the ants' edges.
+
+    1 / num_ants when every ant took the same path, 1.0 when no edge is shared.
+    """
+    paths = np.asarray(ants_paths)
+    if paths.shape[1] < 2:
+        return 0.0
+    codes = paths[:, :-1] * paths.shape[1] + paths[:, 1:]
+    return np.unique(codes).size / codes.size
+
+
+def path_costs(colony, ants_paths):
+    """Cost of every ant's path at once, from the colony's distance matrix or candidate features."""
+    paths = np.asarray(ants_paths)
+    if colony.candidate_k is not None:
+        distances = candidate_list.edge_distances(colony.features, paths[:, :-1].ravel(), paths[:, 1:].ravel())
+        return distances.reshape(len(paths), -1).sum(axis=1)
+    return np.asarray(colony.distance_matrix[paths[:, :-1], paths[:, 1:]]).sum(axis=1)
+
+
+class RingBufferSink:
+    """Keeps the last capacity records in memory (all of them with capacity=None)."""
+
+    def __init__(self, capacity=1000):
+        self.records = collections.deque(maxlen=capacity)
+
+    def write(self, record):
+        self.records.append(record)
+
+    def close(self):
+        pass
+
+
+class CSVSink:
+    """Writes records as CSV rows with a RECORD_FIELDS header."""
+
+    def __init__(self, path):
+        self.file = open(path, 'w', newline='')
+        self.writer = csv.DictWriter(self.file, fieldnames=RECORD_FIELDS)
+        self.writer.writeheader()
+
+    def write(self, record):
+        self.writer.writerow(record)
+
+    def close(self):
+        self.file.close()
+
+
+class JSONLSink:
+    """Writes one JSON object per record and line."""
+
+    def __init__(self, path):
+        self.file = open(path, 'w')
+
+    def write(self, record):
+        self.file.write(json.dumps(record) + '\n')
+
+    def close(self):
+        self.file.close()
+
+
+class CallbackSink:
+    """Calls callback(record) for every record, e.g. to update a plot or a log."""
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    def write(self, record):
+        self.callback(record)
+
+    def close(self):
+        pass
+
+
+class IterationTracer:
+    """Per-iteration instrumentation of a colony's run(), passed as tracer=.
+
+    Every `every`-th iteration (and the first) a record with the phase times, the
+    iteration-best, mean and global best costs, the pheromone entropy and
+    lambda-branching factor and the ants' edge diversity is written to each sink
+    (a RingBufferSink when none are given). Iterations that are not sampled only
+    pay for one modulo. The pheromone metrics read the whole pheromone matrix, so
+    pheromone_metrics=False leaves them out for large colonies. Use the tracer as
+    a context manager, or call close(), to close file sinks.
+    """
+
+    def __init__(self, sinks=None, every=1, pheromone_metrics=True, lam=0.05):
+        self.sinks = [RingBufferSink()] if sinks is None else list(sinks)
+        self.every = every
+        self.pheromone_metrics = pheromone_metrics
+        self.lam = lam
+        self.started = None
+
+    @property
+    def records(self):
+        """Records held by the first RingBufferSink."""
+        for sink in self.sinks:
+            if isinstance(sink, RingBufferSink):
+                return list(sink.records)
+        raise ValueError("The tracer has no RingBufferSink")
+
+    def start(self):
+        self.started = time.perf_counter()
+
+    def samples(self, iteration):
+        return (iteration - 1) % self.every == 0
+
+    def timer(self, iteration):
+        return PhaseTimer(self) if self.samples(iteration) else NO_TIMER
+
+    def record(self, colony, iteration, ants_paths, timings):
+        costs = path_costs(colony, ants_paths)
+        record = {
+            'iteration': iteration,
+            'elapsed_s': time.perf_counter() - self.started,
+            **{f'{phase}_s': timings.get(phase, 0.0)
+               for phase in ('construction', 'local_search', 'pheromone', 'evaluation')},
+            'iteration_best_cost': float(costs.min()),
+            'mean_cost': float(costs.mean()),
+            'best_cost': float(colony.shortest_cost),
+            'pheromone_entropy': None,
+            'branching_factor': None,
+            'edge_diversity': edge_diversity(ants_paths),
+        }
+        if self.pheromone_metrics:
+            pheromone = colony.pheromone_matrix if colony.candidate_k is None else colony.candidate_pheromone
+            record['pheromone_entropy'] = float(pheromone_entropy(pheromone))
+            record['branching_factor'] = float(branching_factor(pheromone, self.lam))
+        for sink in self.sinks:
+            sink.write(record)
+        return record
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class PhaseTimer:
+    """Times the phases of one iteration for an IterationTracer; a no-op when tracer is None."""
+
+    def __init__(self, tracer):
+        self.tracer = tracer
+        self.timings = {}
+        self.last = time.perf_counter() if tracer is not None else None
+
+    def lap(self, phase):
+        """Charge the time since the previous lap (or the start) to phase."""
+        if self.tracer is not None:
+            now = time.perf_counter()
+            self.timings[phase] = now - self.last
+            self.last = now
+
+    def record(self, colony, iteration, ants_paths):
+        if self.tracer is not None:
+            self.tracer.record(colony, iteration, ants_paths, self.timings)
+
+
+# Shared by colonies without a tracer so run() needs no branches
+NO_TIMER = PhaseTimer(None)
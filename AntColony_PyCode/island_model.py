@@ -0,0 +1,127 @@
+import multiprocessing
+import queue
+import time
+
+import numpy as np
+
+from AntColony_PyCode import parallel_colony
+from AntColony_PyCode.ant_colony_optimization import AntColonyOptimization
+
+# Default island settings: a spread of exploration (low alpha) and exploitation (high alpha/beta)
+DEFAULT_ISLANDS = [
+    {'alpha': 1.0, 'beta': 2.0, 'decay': 0.95},
+    {'alpha': 1.0, 'beta': 3.0, 'decay': 0.90},
+    {'alpha': 2.0, 'beta': 2.0, 'decay': 0.95},
+    {'alpha': 0.5, 'beta': 2.0, 'decay': 0.98},
+]
+
+
+def check_colony_kwargs(colony_kwargs):
+    """Raise ValueError for colony settings the island loop cannot honour.
+
+    Every island has to reach each migration to keep the ring going, so a
+    stopping criterion cannot end one early.
+    """
+    if colony_kwargs.get('stopping') is not None:
+        raise ValueError("run_islands cannot pass a stopping criterion to the island colonies")
+
+
+def _tracer_records(tracer):
+    """Records of the island's tracer that can be sent back to the parent process."""
+    if tracer is None:
+        return None
+    tracer.close()
+    try:
+        return tracer.records
+    except ValueError:  # Without a RingBufferSink the records only went to the island's sinks
+        return None
+
+
+def _run_island(island, params, pvt_data, num_ants, num_iterations, migration_interval, seed,
+                inbox, outbox, results, colony_class, colony_kwargs):
+    np.random.seed(seed)
+    start = time.perf_counter()
+    colony = colony_class(pvt_data, num_ants=num_ants, num_iterations=num_iterations, **params, **colony_kwargs)
+    colony.stop_reason = 'max_iterations'
+    if colony.tracer is not None:
+        colony.tracer.start()
+    migrants_accepted = 0
+    with parallel_colony.path_builder(colony) as generate_ant_paths:
+        for iteration in range(1, num_iterations + 1):
+            colony.run_iteration(iteration, generate_ant_paths)
+
+            if iteration % migration_interval == 0 and iteration < num_iterations:
+                # Send our best tour to the next island and take the previous island's best
+                outbox.put((np.asarray(colony.shortest_path), colony.shortest_cost))
+                migrant_path, migrant_cost = inbox.get()
+                if migrant_cost < colony.shortest_cost:
+                    colony.shortest_path = migrant_path
+                    colony.shortest_cost = migrant_cost
+                    colony.deposit_pheromone(migrant_path)
+                    colony.history[-1] = migrant_cost
+                    migrants_accepted += 1
+
+    results.put({
+        'island': island,
+        'params': params,
+        'shortest_path': np.asarray(colony.shortest_path),
+        'shortest_cost': colony.shortest_cost,
+        'history': colony.history,
+        'iterations_run': colony.iterations_run,
+        'trace': _tracer_records(colony.tracer),
+        'migrants_accepted': migrants_accepted,
+        'elapsed': time.perf_counter() - start,
+    })
+
+
+def run_islands(pvt_data, islands=None, num_ants=20, num_iterations=200, migration_interval=10, seed=None,
+                colony_class=AntColonyOptimization, **colony_kwargs):
+    """Run independent colonies in separate processes with periodic best-tour migration.
+
+    islands is a list of keyword dicts (alpha, beta, decay, ...) for each colony.
+    Every migration_interval iterations each island sends its best tour to the next
+    island in a ring; a migrant that beats the receiving island's best replaces it
+    and is reinforced in that island's pheromone. colony_kwargs go to every
+    colony, whose iterations run as in its run() (see run_iteration); a stopping
+    criterion raises ValueError (see check_colony_kwargs). A tracer runs in each
+    island process, and the records of its RingBufferSink come back as the
+    island's 'trace'.
+
+    Returns a dict with the global 'shortest_path' and 'shortest_cost' and a list of
+    per-island statistics under 'islands', including each island's best cost after
+    every iteration ('history').
+    """
+    check_colony_kwargs(colony_kwargs)
+    islands = DEFAULT_ISLANDS if islands is None else islands
+    seeds = [int(child.generate_state(1)[0]) for child in np.random.SeedSequence(seed).spawn(len(islands))]
+    context = multiprocessing.get_context()
+    queues = [context.Queue() for _ in islands]
+    results = context.Queue()
+    processes = []
+    for island, params in enumerate(islands):
+        process = context.Process(target=_run_island, args=(
+            island, params, pvt_data, num_ants, num_iterations, migration_interval, seeds[island],
+            queues[island], queues[(island + 1) % len(islands)], results, colony_class, colony_kwargs))
+        process.start()
+        processes.append(process)
+
+    island_stats = []
+    while len(island_stats) < len(processes):
+        try:
+            island_stats.append(results.get(timeout=1.0))
+        except queue.Empty:
+            failed = [process.exitcode for process in processes if process.exitcode not in (None, 0)]
+            if failed:
+                for process in processes:
+                    process.terminate()
+                raise RuntimeError(f"An island process exited with code {failed[0]}")
+    for process in processes:
+        process.join()
+    island_stats.sort(key=lambda stats: stats['island'])
+
+    best = min(island_stats, key=lambda stats: stats['shortest_cost'])
+    return {
+        'shortest_path': best['shortest_path'],
+        'shortest_cost': best['shortest_cost'],
+        'islands': island_stats,
+    }
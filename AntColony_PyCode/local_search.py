@@ -0,0 +1,217 @@
+import numpy as np
+
+from AntColony_PyCode import candidate_list
+
+# Moves have to shorten the path by more than this to be applied
+IMPROVEMENT_TOLERANCE = 1e-9
+
+
+def _path_edges(distance, path):
+    """Length of edge k -> k + 1 of the path at index k + 1, for k = -1 .. n - 1.
+
+    Positions -1 and n are the free ends of the (open) path, so the first and
+    last entries are zero.
+    """
+    edges = np.zeros(len(path) + 1)
+    edges[1:-1] = distance(path[:-1], path[1:])
+    return edges
+
+
+def _distances(distance, path, origins, targets):
+    """distance between path positions origins and targets, zero where either is a free end."""
+    num_points = len(path)
+    inside = (origins >= 0) & (origins < num_points) & (targets >= 0) & (targets < num_points)
+    lengths = np.zeros(len(origins))
+    if inside.any():
+        lengths[inside] = distance(path[origins[inside]], path[targets[inside]])
+    return lengths
+
+
+def _select_disjoint(delta, low, high, num_points):
+    """Indices of improving moves, best first, whose position ranges [low, high] do not overlap.
+
+    Moves that touch disjoint parts of the path do not change each other's gain,
+    so all of them can be applied in the same round.
+    """
+    touched = np.zeros(num_points + 2, dtype=bool)
+    selected = []
+    for move in np.argsort(delta):
+        if delta[move] >= -IMPROVEMENT_TOLERANCE:
+            break
+        # Shift by one so the free end at position -1 has a slot too
+        lo, hi = low[move] + 1, high[move] + 2
+        if not touched[lo:hi].any():
+            touched[lo:hi] = True
+            selected.append(move)
+    return selected
+
+
+def _neighbour_positions(path, position, neighbours):
+    """Rows of path positions and the positions of their neighbours, both flattened."""
+    rows = np.repeat(np.arange(len(path)), neighbours.shape[1])
+    return rows, position[neighbours[path]].ravel()
+
+
+def two_opt(path, distance, neighbours=None, max_rounds=100):
+    """Improve an open path with 2-opt moves (reversing a segment).
+
+    distance(i, j) returns the distances between two equally long index arrays.
+    Every round evaluates all candidate moves at once and applies the improving
+    ones that do not overlap. Without neighbours every segment is a candidate
+    (O(n^2) per round, for small paths); with an (n, k) array of neighbour lists
+    only moves that create an edge to a neighbour are, which is O(n k) per round.
+    Rounds repeat until no move improves the path. Returns the improved path.
+    """
+    path = np.array(path, dtype=int)
+    num_points = len(path)
+    if num_points < 3:
+        return path
+    position = np.empty(num_points, dtype=int)
+    if neighbours is None:
+        # Position -1 is the free front end, so reversing a prefix is a move too
+        a, b = np.triu_indices(num_points + 1, k=2)
+        a, b = a - 1, b - 1
+    for _ in range(max_rounds):
+        position[path] = np.arange(num_points)
+        edges = _path_edges(distance, path)
+        if neighbours is not None:
+            rows, other = _neighbour_positions(path, position, neighbours)
+            a, b = np.minimum(rows, other), np.maximum(rows, other)
+            keep = b - a >= 2
+            a, b = a[keep], b[keep]
+        # Reversing path[a + 1:b + 1] replaces edges (a, a+1) and (b, b+1) by (a, b) and (a+1, b+1)
+        delta = (_distances(distance, path, a, b) + _distances(distance, path, a + 1, b + 1)
+                 - edges[a + 1] - edges[b + 1])
+        selected = _select_disjoint(delta, a, b + 1, num_points)
+        if not selected:
+            break
+        for move in selected:
+            path[a[move] + 1:b[move] + 1] = path[a[move] + 1:b[move] + 1][::-1].copy()
+    return path
+
+
+def or_opt(path, distance, neighbours=None, segment_lengths=(1, 2, 3), max_rounds=100):
+    """Improve an open path with Or-opt moves (moving a short segment, possibly reversed, elsewhere).
+
+    Without neighbours every insertion point of every segment is evaluated;
+    with neighbour lists only the points next to a neighbour of the segment's
+    ends. See two_opt for the other arguments. Returns the improved path.
+    """
+    path = np.array(path, dtype=int)
+    num_points = len(path)
+    position = np.empty(num_points, dtype=int)
+    for _ in range(max_rounds):
+        position[path] = np.arange(num_points)
+        edges = _path_edges(distance, path)
+        starts, targets, lengths = [], [], []
+        for length in segment_lengths:
+            if length >= num_points:
+                continue
+            segment_starts = np.arange(num_points - length + 1)
+            # Insert between t and t + 1 (t = -1 is the front)
+            if neighbours is None:
+                t = np.broadcast_to(np.arange(-1, num_points), (len(segment_starts), num_points + 1))
+            else:
+                near = np.concatenate([position[neighbours[path[segment_starts]]],
+                                       position[neighbours[path[segment_starts + length - 1]]]], axis=1)
+                t = np.concatenate([near - 1, near], axis=1)
+            starts.append(np.broadcast_to(segment_starts[:, None], t.shape).ravel())
+            targets.append(t.ravel())
+            lengths.append(np.full(t.size, length))
+        if not starts:
+            break
+        s, t = np.concatenate(starts), np.concatenate(targets)
+        e = s + np.concatenate(lengths) - 1
+        keep = (t < s - 1) | (t > e)
+        s, e, t = s[keep], e[keep], t[keep]
+
+        # Length saved by cutting the segment out and joining its neighbours
+        removed = edges[s] + edges[e + 1] - _distances(distance, path, s - 1, e + 1)
+        base = edges[t + 1]
+        forward = _distances(distance, path, t, s) + _distances(distance, path, e, t + 1) - base
+        backward = _distances(distance, path, t, e) + _distances(distance, path, s, t + 1) - base
+        delta = np.minimum(forward, backward) - removed
+        selected = _select_disjoint(delta, np.minimum(s - 1, t), np.maximum(e + 1, t + 1), num_points)
+        if not selected:
+            break
+        for move in selected:
+            segment = path[s[move]:e[move] + 1].copy()
+            if backward[move] < forward[move]:
+                segment = segment[::-1]
+            if t[move] < s[move]:
+                path[t[move] + 1:e[move] + 1] = np.concatenate([segment, path[t[move] + 1:s[move]]])
+            else:
+                path[s[move]:t[move] + 1] = np.concatenate([path[e[move] + 1:t[move] + 1], segment])
+    return path
+
+
+def nearest_neighbours_from_matrix(distance_matrix, k, block_size=1024):
+    """The k nearest neighbours of every point from a dense (possibly memmapped) distance matrix."""
+    num_points = len(distance_matrix)
+    k = min(k, num_points - 1)
+    neighbours = np.empty((num_points, k), dtype=int)
+    for start in range(0, num_points, block_size):
+        stop = min(start + block_size, num_points)
+        rows = np.array(distance_matrix[start:stop], dtype=float)
+        rows[np.arange(stop - start), np.arange(start, stop)] = np.inf
+        nearest = np.argpartition(rows, k - 1, axis=1)[:, :k]
+        order = np.argsort(np.take_along_axis(rows, nearest, axis=1), axis=1)
+        neighbours[start:stop] = np.take_along_axis(nearest, order, axis=1)
+    return neighbours
+
+
+class LocalSearch:
+    """Local search applied to the ant paths of every iteration, before the pheromone update.
+
+    apply_to is 'best' (only the iteration-best path) or 'all' (every ant's path).
+    Each path gets 2-opt moves and, with or_opt=True, Or-opt moves as well. The
+    improved paths replace the constructed ones, so they are the ones that receive
+    pheromone. With neighbours=k the moves are restricted to the k nearest
+    neighbours of each point (a candidate-list colony always uses its own lists);
+    neighbours=None tries every move.
+    """
+
+    def __init__(self, apply_to='best', or_opt=False, neighbours=10, max_rounds=100):
+        if apply_to not in ('best', 'all'):
+            raise ValueError("apply_to must be 'best' or 'all'")
+        self.apply_to = apply_to
+        self.or_opt = or_opt
+        self.neighbours = neighbours
+        self.max_rounds = max_rounds
+        self._neighbour_lists = None
+        self._neighbours_of = None
+
+    def _distance_and_neighbours(self, colony):
+        if colony.candidate_k is not None:
+            def distance(i, j):
+                return candidate_list.edge_distances(colony.features, i, j)
+            return distance, colony.candidates
+
+        def distance(i, j):
+            return colony.distance_matrix[i, j]
+        if self.neighbours is None:
+            return distance, None
+        # The lists only depend on the distance matrix, so they are found once per matrix
+        if self._neighbours_of is not colony.distance_matrix:
+            self._neighbour_lists = nearest_neighbours_from_matrix(colony.distance_matrix, self.neighbours)
+            self._neighbours_of = colony.distance_matrix
+        return distance, self._neighbour_lists
+
+    def improve(self, path, distance, neighbours=None):
+        path = two_opt(path, distance, neighbours, self.max_rounds)
+        if self.or_opt:
+            path = or_opt(path, distance, neighbours, max_rounds=self.max_rounds)
+        return path
+
+    def apply(self, colony, ants_paths):
+        """Return ants_paths with the selected paths replaced by their improved versions."""
+        distance, neighbours = self._distance_and_neighbours(colony)
+        if self.apply_to == 'all':
+            selected = range(len(ants_paths))
+        else:
+            costs = [np.sum(distance(path[:-1], path[1:])) for path in map(np.asarray, ants_paths)]
+            selected = [int(np.argmin(costs))]
+        ants_paths = list(ants_paths) if not isinstance(ants_paths, np.ndarray) else ants_paths.copy()
+        for ant in selected:
+            ants_paths[ant] = self.improve(ants_paths[ant], distance, neighbours)
+        return ants_paths
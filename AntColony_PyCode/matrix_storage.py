@@ -0,0 +1,69 @@
+import os
+import shutil
+import tempfile
+import weakref
+
+import numpy as np
+
+# Scratch space used for blockwise work when no memory budget is given
+DEFAULT_BLOCK_BUDGET = 64 * 2**20
+
+# A lazy evaporation scale below this is folded back into the stored pheromone,
+# which keeps the stored values (and their alpha powers) far from overflow
+RENORMALIZE_BELOW = 1e-12
+
+
+def resolve_storage_dir(storage_dir, num_points, itemsize, memory_budget, num_matrices=2, owner=None):
+    """Decide where the n x n matrices live.
+
+    Returns storage_dir when one is given. Otherwise, when memory_budget (in bytes)
+    is set and the dense matrices would not fit in it, a temporary directory is
+    created for them; it is removed with everything in it once owner (the colony
+    holding the matrices) is garbage collected, or at interpreter exit. None means
+    the matrices are kept in RAM.
+    """
+    if storage_dir is not None:
+        os.makedirs(storage_dir, exist_ok=True)
+        return storage_dir
+    if memory_budget is not None and num_matrices * num_points * num_points * itemsize > memory_budget:
+        directory = tempfile.mkdtemp(prefix='aco_matrices_')
+        if owner is not None:
+            weakref.finalize(owner, shutil.rmtree, directory, ignore_errors=True)
+        return directory
+    return None
+
+
+def allocate(shape, dtype, storage_dir=None, name='matrix'):
+    """An uninitialised matrix, backed by a .npy memmap file in storage_dir when given."""
+    if storage_dir is None:
+        return np.empty(shape, dtype=dtype)
+    path = os.path.join(storage_dir, f'{name}.npy')
+    return np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=shape)
+
+
+def row_blocks(matrix, memory_budget=None):
+    """Yield (start, stop) row ranges whose size keeps a block within memory_budget bytes."""
+    budget = DEFAULT_BLOCK_BUDGET if memory_budget is None else memory_budget
+    row_bytes = max(1, matrix[0].nbytes) if len(matrix) else 1
+    step = int(max(1, budget // row_bytes))
+    for start in range(0, len(matrix), step):
+        yield start, min(start + step, len(matrix))
+
+
+def fill_blockwise(matrix, value, memory_budget=None):
+    for start, stop in row_blocks(matrix, memory_budget):
+        matrix[start:stop] = value
+    return matrix
+
+
+def scale_blockwise(matrix, factor, memory_budget=None):
+    """In-place matrix *= factor, one block of rows at a time."""
+    for start, stop in row_blocks(matrix, memory_budget):
+        matrix[start:stop] *= factor
+    return matrix
+
+
+def renormalize(matrix, scale, memory_budget=None):
+    """Fold a lazy evaporation scale into the stored matrix and return the new scale (1.0)."""
+    scale_blockwise(matrix, scale, memory_budget)
+    return 1.0
@@ -0,0 +1,141 @@
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from AntColony_PyCode import compiled_kernels
+
+# Shared matrices attached once per worker process by _attach_worker
+_worker_matrices = {}
+
+
+def draw_random_numbers(seeds, num_points):
+    """Start node and (num_points - 1) step draws of every ant, each from the generator of its own seed."""
+    starts = np.empty(len(seeds), dtype=np.int64)
+    draws = np.empty((len(seeds), num_points - 1))
+    for ant, seed in enumerate(seeds):
+        rng = np.random.default_rng(seed)
+        starts[ant] = rng.integers(num_points)
+        draws[ant] = rng.random(num_points - 1)
+    return starts, draws
+
+
+def construct_paths(heuristic, pheromone_alpha, starts, draws):
+    """Build one path per ant together, one vectorized step per node.
+
+    heuristic is (1 / d) ** beta and pheromone_alpha is pheromone ** alpha, both
+    n x n; starts and draws are the ants' random numbers, as for
+    compiled_kernels.construct_paths.
+    """
+    num_ants = len(starts)
+    num_points = len(heuristic)
+    ants = np.arange(num_ants)
+    paths = np.empty((num_ants, num_points), dtype=int)
+    current = starts
+    paths[:, 0] = current
+    visited = np.zeros((num_ants, num_points), dtype=bool)
+    visited[ants, current] = True
+    for step in range(1, num_points):
+        rows = pheromone_alpha[current] * np.where(visited, 0, heuristic[current])
+        cdf = np.cumsum(rows, axis=1)
+        compiled_kernels.check_weights(rows, cdf[:, -1])
+        current = np.sum(cdf <= draws[:, step - 1, None] * cdf[:, -1:], axis=1)
+        paths[:, step] = current
+        visited[ants, current] = True
+    return paths
+
+
+class SharedMatrix:
+    """An n x n matrix in a multiprocessing.shared_memory block."""
+
+    def __init__(self, shape, dtype=np.float64):
+        self.shape = shape
+        self.dtype = np.dtype(dtype)
+        self.memory = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * self.dtype.itemsize))
+        self.array = np.ndarray(shape, dtype=self.dtype, buffer=self.memory.buf)
+
+    def handle(self):
+        """What a worker needs to attach to the block."""
+        return self.memory.name, self.shape, self.dtype.str
+
+    def close(self):
+        del self.array
+        self.memory.close()
+        self.memory.unlink()
+
+
+def _attach_worker(handles):
+    for key, (name, shape, dtype) in handles.items():
+        memory = shared_memory.SharedMemory(name=name)
+        _worker_matrices[key] = (memory, np.ndarray(shape, dtype=dtype, buffer=memory.buf))
+
+
+def _construct_paths_worker(seeds, backend):
+    heuristic = _worker_matrices['heuristic'][1]
+    pheromone_alpha = _worker_matrices['pheromone_alpha'][1]
+    starts, draws = draw_random_numbers(seeds, len(heuristic))
+    if backend == 'numba':
+        return compiled_kernels.construct_paths(pheromone_alpha, heuristic, starts, draws)
+    return construct_paths(heuristic, pheromone_alpha, starts, draws)
+
+
+def check_colony(colony):
+    """Raise ValueError when the colony's matrices cannot be copied to shared memory for the workers."""
+    if colony.storage_dir is not None:
+        raise ValueError("num_workers > 1 copies the dense matrices to shared memory, so it cannot be used with "
+                         "on-disk matrices (storage_dir, or a memory_budget they do not fit in)")
+
+
+class ParallelPathBuilder:
+    """Spreads each iteration's ants over a process pool.
+
+    The heuristic matrix is written to shared memory once per run and
+    pheromone ** alpha once per iteration, both in the dtype of the colony's
+    distance matrix, so workers never receive the matrices through pickling. The
+    workers build the paths with the vectorized construction (or the compiled one
+    with backend='numba'), whatever the colony's construction setting. Every ant
+    gets its own child of a np.random.SeedSequence, so a run with a fixed seed
+    gives the same paths for any num_workers and any scheduling of the batches.
+    """
+
+    def __init__(self, colony, num_workers, seed=None):
+        check_colony(colony)
+        self.colony = colony
+        self.num_workers = num_workers
+        self.seed_sequence = np.random.SeedSequence(seed)
+        shape = colony.distance_matrix.shape
+        dtype = colony.distance_matrix.dtype
+        self.heuristic = SharedMatrix(shape, dtype)
+        self.pheromone_alpha = SharedMatrix(shape, dtype)
+        for start in range(0, shape[0], 1024):
+            rows = colony.distance_matrix[start:start + 1024]
+            self.heuristic.array[start:start + 1024] = (1.0 / (rows + 1e-10)) ** colony.beta
+        handles = {'heuristic': self.heuristic.handle(), 'pheromone_alpha': self.pheromone_alpha.handle()}
+        self.executor = ProcessPoolExecutor(max_workers=num_workers, initializer=_attach_worker, initargs=(handles,))
+
+    def generate_ant_paths(self):
+        np.power(self.colony.pheromone_matrix, self.colony.alpha, out=self.pheromone_alpha.array)
+        seeds = self.seed_sequence.spawn(self.colony.num_ants)
+        batches = [batch for batch in np.array_split(np.arange(self.colony.num_ants), self.num_workers) if len(batch)]
+        futures = [self.executor.submit(_construct_paths_worker, [seeds[ant] for ant in batch], self.colony.backend)
+                   for batch in batches]
+        return np.concatenate([future.result() for future in futures])
+
+    def close(self):
+        self.executor.shutdown()
+        self.heuristic.close()
+        self.pheromone_alpha.close()
+
+
+@contextlib.contextmanager
+def path_builder(colony):
+    """Yield the function that builds one iteration of ant paths for the colony."""
+    if not colony.num_workers or colony.num_workers <= 1:
+        yield colony.generate_ant_paths
+        return
+    builder = ParallelPathBuilder(colony, colony.num_workers, colony.seed)
+    try:
+        yield builder.generate_ant_paths
+    finally:
+        builder.close()
@@ -0,0 +1,177 @@
+import glob
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from AntColony_PyCode.ant_colony_optimization import AntColonyOptimization
+from pvt_Data.pvt_dataset import PVTDataset
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'aco_gor')
+
+
+def data_fingerprint(data):
+    """Content hash of a dataset: a list of dicts, a PVTDataset, a pandas DataFrame or a NumPy array."""
+    digest = hashlib.sha256()
+    if isinstance(data, PVTDataset):
+        data = {name: data[name] for name in data.columns}
+    if isinstance(data, dict):
+        for name in sorted(data):
+            digest.update(str(name).encode())
+            values = np.asarray(data[name])
+            digest.update(values.tobytes() if values.dtype.kind in 'biuf' else repr(values.tolist()).encode())
+    elif hasattr(data, 'columns'):
+        import pandas as pd
+        digest.update(json.dumps([str(name) for name in data.columns]).encode())
+        digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    elif isinstance(data, np.ndarray):
+        digest.update(str((data.shape, data.dtype.str)).encode())
+        digest.update(np.ascontiguousarray(data).tobytes())
+    else:
+        names = sorted(data[0]) if len(data) else []
+        for name in names:
+            digest.update(str(name).encode())
+            values = np.asarray([record[name] for record in data])
+            digest.update(values.tobytes() if values.dtype.kind in 'biuf' else repr(values.tolist()).encode())
+    return digest.hexdigest()
+
+
+def params_fingerprint(params):
+    return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+
+
+# Parameters that change the distances (or which edges carry pheromone), so a warm start
+# is only taken from a run that shares them
+DISTANCE_PARAMS = ('candidate_k', 'distance_dtype', 'standardize')
+
+
+def warm_start_fingerprint(colony_class, params):
+    return params_fingerprint({'colony': colony_class.__name__,
+                               **{name: params.get(name) for name in DISTANCE_PARAMS}})
+
+
+class ResultCache:
+    """Fitted ACO results stored as .npz files, keyed by dataset and hyperparameters.
+
+    Each entry holds the shortest path, its cost, the final pheromone matrix and
+    the per-iteration history. When the files exceed max_bytes the least recently
+    used entries are removed (loading an entry marks it as used).
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=2 * 2**30):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path(self, data_key, params_key):
+        # The data part comes first so entries for the same dataset can be found by prefix
+        return os.path.join(self.cache_dir, f'{data_key[:32]}-{params_key[:32]}.npz')
+
+    def load(self, data_key, params_key):
+        return self._read(self.path(data_key, params_key))
+
+    def load_any(self, data_key, warm_key):
+        """The most recently used entry for the dataset with the same warm_key, or None.
+
+        warm_key (see warm_start_fingerprint) covers the colony class and the
+        distance settings; the other hyperparameters may differ.
+        """
+        entries = glob.glob(os.path.join(self.cache_dir, f'{data_key[:32]}-*.npz'))
+        for path in sorted(entries, key=os.path.getmtime, reverse=True):
+            try:
+                with np.load(path) as entry:
+                    # Entries written before warm keys were stored are never used for a warm start
+                    matches = 'warm_key' in entry.files and str(entry['warm_key']) == warm_key
+            except (OSError, ValueError):
+                continue
+            if matches:
+                return self._read(path)
+        return None
+
+    def _read(self, path):
+        try:
+            with np.load(path) as entry:
+                result = {name: entry[name] for name in entry.files if name != 'warm_key'}
+        except (OSError, ValueError):
+            return None
+        os.utime(path)
+        result['shortest_cost'] = float(result['shortest_cost'])
+        return result
+
+    def save(self, data_key, params_key, shortest_path, shortest_cost, pheromone, history, warm_key=''):
+        path = self.path(data_key, params_key)
+        temporary = path + '.tmp'
+        with open(temporary, 'wb') as f:
+            np.savez(f, shortest_path=np.asarray(shortest_path), shortest_cost=shortest_cost,
+                     pheromone=np.asarray(pheromone), history=np.asarray(history, dtype=float),
+                     warm_key=np.array(warm_key))
+        os.replace(temporary, path)
+        self.evict()
+
+    def evict(self):
+        entries = sorted(glob.glob(os.path.join(self.cache_dir, '*.npz')), key=os.path.getmtime)
+        total = sum(os.path.getsize(entry) for entry in entries)
+        while entries and total > self.max_bytes:
+            oldest = entries.pop(0)
+            total -= os.path.getsize(oldest)
+            os.remove(oldest)
+
+
+def current_pheromone(colony):
+    """The colony's pheromone with any lazy evaporation scale applied (empty for an exact solution)."""
+    if getattr(colony, 'exact_solution', None) is not None:
+        return np.empty(0)
+    if colony.candidate_k is not None:
+        return np.array(colony.candidate_pheromone)
+    return np.asarray(colony.pheromone_matrix) * colony.pheromone_scale
+
+
+def restore_pheromone(colony, pheromone):
+    if colony.candidate_k is not None:
+        colony.candidate_pheromone[...] = pheromone
+    else:
+        colony.pheromone_matrix[...] = pheromone
+        colony.pheromone_scale = 1.0
+
+
+def run_cached(pvt_data, cache=None, warm_start=False, seed=None, colony_class=AntColonyOptimization, **params):
+    """Run a colony, or load its result when the same data and hyperparameters were run before.
+
+    With warm_start, a miss that finds a cached run of the same data, colony class
+    and DISTANCE_PARAMS with other hyperparameters starts from its pheromone matrix
+    and shortest path; the path's cost is recomputed on the new colony.
+    Returns a dict with shortest_path, shortest_cost, pheromone, history and
+    'cached' (True when the result was loaded rather than computed).
+    """
+    cache = ResultCache() if cache is None else cache
+    data_key = data_fingerprint(pvt_data)
+    params_key = params_fingerprint({'colony': colony_class.__name__, 'seed': seed, **params})
+    result = cache.load(data_key, params_key)
+    if result is not None:
+        result['cached'] = True
+        return result
+
+    if seed is not None:
+        np.random.seed(seed)
+        params['seed'] = seed
+    colony = colony_class(pvt_data, **params)
+    warm_key = warm_start_fingerprint(colony_class, params)
+    if warm_start and getattr(colony, 'exact_solution', None) is None:
+        previous = cache.load_any(data_key, warm_key)
+        if previous is not None and previous['pheromone'].shape == current_pheromone(colony).shape:
+            restore_pheromone(colony, previous['pheromone'])
+            colony.shortest_path = previous['shortest_path']
+            # Measured on this colony's distances rather than trusted from the cache
+            colony.shortest_cost = colony.calculate_path_cost(colony.shortest_path)
+    colony.run()
+
+    result = {
+        'shortest_path': np.asarray(colony.shortest_path),
+        'shortest_cost': float(colony.shortest_cost),
+        'pheromone': current_pheromone(colony),
+        'history': np.asarray(colony.history, dtype=float),
+    }
+    cache.save(data_key, params_key, warm_key=warm_key, **result)
+    result['cached'] = False
+    return result
@@ -0,0 +1,75 @@
+import time
+
+import numpy as np
+
+
+def pheromone_entropy(pheromone, block_size=1024):
+    """Mean normalised entropy of the rows of a pheromone matrix.
+
+    1.0 means pheromone is spread evenly over every edge; values near 0 mean each
+    node has collapsed onto a single successor (stagnation). The result does not
+    depend on a global scale factor, so lazily evaporated matrices can be passed as is.
+    """
+    num_rows, num_cols = pheromone.shape
+    if num_cols < 2 or num_rows == 0:
+        return 0.0
+    total = 0.0
+    for start in range(0, num_rows, block_size):
+        rows = np.asarray(pheromone[start:start + block_size], dtype=float)
+        probs = rows / np.sum(rows, axis=1, keepdims=True)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            total += -np.sum(np.where(probs > 0, probs * np.log(probs), 0.0))
+    return total / (num_rows * np.log(num_cols))
+
+
+class StoppingCriteria:
+    """Decides when an ACO run can stop before num_iterations.
+
+    patience: stop after this many iterations without any improvement of the best cost.
+    min_relative_improvement: stop when the best cost improved by less than this
+        fraction over the last improvement_window iterations.
+    min_entropy: stop when the mean pheromone entropy (see pheromone_entropy) drops
+        below this value; it is checked every entropy_interval iterations.
+    time_budget: stop after this many seconds of wall-clock time.
+
+    check() returns the name of the criterion that fired ('no_improvement',
+    'relative_improvement', 'stagnation' or 'time_budget') or None.
+    """
+
+    def __init__(self, patience=None, min_relative_improvement=None, improvement_window=10, min_entropy=None,
+                 entropy_interval=10, time_budget=None):
+        self.patience = patience
+        self.min_relative_improvement = min_relative_improvement
+        self.improvement_window = improvement_window
+        self.min_entropy = min_entropy
+        self.entropy_interval = entropy_interval
+        self.time_budget = time_budget
+        self.reset()
+
+    def reset(self):
+        self.start_time = time.perf_counter()
+        self.best_cost = np.inf
+        self.last_improvement = 0
+        self.history = []
+
+    def check(self, iteration, best_cost, pheromone=None):
+        """Record the best cost after iteration (1-based) and return the criterion that fired, if any."""
+        if best_cost < self.best_cost:
+            self.best_cost = best_cost
+            self.last_improvement = iteration
+        self.history.append(best_cost)
+
+        if self.patience is not None and iteration - self.last_improvement >= self.patience:
+            return 'no_improvement'
+        if self.min_relative_improvement is not None and len(self.history) > self.improvement_window:
+            previous = self.history[-self.improvement_window - 1]
+            if np.isfinite(previous) and previous > 0:
+                if (previous - best_cost) / previous < self.min_relative_improvement:
+                    return 'relative_improvement'
+        if (self.min_entropy is not None and pheromone is not None
+                and iteration % self.entropy_interval == 0
+                and pheromone_entropy(pheromone) < self.min_entropy):
+            return 'stagnation'
+        if self.time_budget is not None and time.perf_counter() - self.start_time >= self.time_budget:
+            return 'time_budget'
+        return None
@@ -1,66 +1,182 @@
 import numpy as np
-import pandas as pd
 from tqdm import tqdm 
 
-# Load the data from CSV
-pvt_data_df = pd.read_csv("C:/Users/hp/Documents/GitHub/ACO-Algorithm-For-Solution-Gas-Oil-Ratio-PVT-Correlation/pvt_Data/cleaned_production_data.csv")
+from AntColony_PyCode import candidate_list, compiled_kernels, exact_path, incremental, instrumentation, matrix_storage, parallel_colony
+from AntColony_PyCode.distance_matrix import pairwise_distances, standardize_features
+from pvt_Data.pvt_dataset import column_array, column_values
 
-# Sample 50 rows from the DataFrame
-pvt_data_df = pvt_data_df.sample(n=100, random_state=1)
-
-print(pvt_data_df)
+# Columns that make up the Euclidean distance between two production records
+DISTANCE_COLUMNS = ['AVG_DOWNHOLE_PRESSURE', 'AVG_DOWNHOLE_TEMPERATURE', 'AVG_ANNULUS_PRESS', 'AVG_CHOKE_SIZE_P', 'Calculated_GOR']
 
 class AntColonyOptimization:
-    def __init__(self, pvt_data, num_ants=10, num_iterations=100, decay=0.95, alpha=1, beta=2):
+    def __init__(self, pvt_data, num_ants=10, num_iterations=100, decay=0.95, alpha=1, beta=2, candidate_k=None,
+                 distance_dtype=np.float64, standardize=False, storage_dir=None, memory_budget=None,
+                 lazy_evaporation=False, num_workers=None, seed=None, stopping=None, local_search=None,
+                 solver='colony', tracer=None, backend='numpy'):
+        if candidate_k is not None and num_workers and num_workers > 1:
+            raise ValueError("num_workers > 1 needs the dense matrices, so it cannot be used with candidate_k")
         self.pvt_data = pvt_data
         self.num_ants = num_ants
         self.num_iterations = num_iterations
         self.decay = decay
         self.alpha = alpha
         self.beta = beta
-        self.distance_matrix = self.calculate_distance_matrix()
-        self.pheromone_matrix = np.ones_like(self.distance_matrix) / len(pvt_data)
+        self.candidate_k = candidate_k
+        self.distance_dtype = distance_dtype
+        self.standardize = standardize
+        self.memory_budget = memory_budget
+        # With lazy evaporation the real pheromone is pheromone_matrix * pheromone_scale
+        self.lazy_evaporation = lazy_evaporation
+        self.pheromone_scale = 1.0
+        # Ants of an iteration are spread over num_workers processes, seeded from seed; the workers
+        # always use the vectorized construction (see parallel_colony.ParallelPathBuilder)
+        self.num_workers = num_workers
+        self.seed = seed
+        # Optional StoppingCriteria; run() records which criterion ended it and after how many iterations
+        self.stopping = stopping
+        self.stop_reason = None
+        self.iterations_run = 0
+        # Optional LocalSearch applied to the constructed paths before they deposit pheromone
+        self.local_search = local_search
+        # Optional instrumentation.IterationTracer that records phase times and convergence metrics
+        self.tracer = tracer
+        # 'numba' runs construction, path costs and deposits of the dense matrices as compiled kernels
+        # (see compiled_kernels); 'auto' uses them when Numba is installed
+        self.backend = compiled_kernels.resolve_backend(backend)
+        # Global shortest cost after every iteration of the last run
+        self.history = []
+        # With solver='exact' or 'auto' a sorted path is returned when it is provably shortest, which needs
+        # a single varying distance column (the Euclidean distance is not separable)
+        self.solver = solver
+        self.exact_solution = exact_path.resolve_solver(solver, self.feature_array(), 'euclidean')
+        if self.exact_solution is not None:
+            self.distance_matrix = None
+            self.pheromone_matrix = None
+            self.storage_dir = None
+        elif candidate_k is None:
+            # Matrices go to np.memmap files when a storage directory is given or they exceed the memory budget
+            self.storage_dir = matrix_storage.resolve_storage_dir(storage_dir, len(pvt_data),
+                                                                  np.dtype(distance_dtype).itemsize, memory_budget,
+                                                                  owner=self)
+            if num_workers and num_workers > 1:
+                parallel_colony.check_colony(self)
+            self.distance_matrix = self.calculate_distance_matrix()
+            self.pheromone_matrix = matrix_storage.allocate(self.distance_matrix.shape, self.distance_matrix.dtype,
+                                                            self.storage_dir, 'pheromone')
+            matrix_storage.fill_blockwise(self.pheromone_matrix, 1.0 / len(pvt_data), memory_budget)
+        else:
+            # Only the k nearest neighbours of each record keep a distance and a pheromone value
+            self.features = self.feature_array()
+            self.candidates, self.candidate_distances = candidate_list.nearest_neighbours(self.features, candidate_k)
+            self.candidate_heuristic = (1.0 / (self.candidate_distances + 1e-10)) ** self.beta
+            self.candidate_pheromone = np.ones_like(self.candidate_distances) / len(pvt_data)
+            self.distance_matrix = None
+            self.pheromone_matrix = None
+            self.storage_dir = None
         self.shortest_path = None
         self.shortest_cost = np.inf
 
+    def feature_array(self):
+        # Pull the distance columns out of the DataFrame once instead of per cell
+        features = column_array(self.pvt_data, DISTANCE_COLUMNS)
+        if self.standardize:
+            return standardize_features(features)
+        return candidate_list.as_feature_array(features)
+
     def calculate_distance_matrix(self):
         num_points = len(self.pvt_data)
-        dist_matrix = np.zeros((num_points, num_points))
-        
-        for i in range(num_points):
-            for j in range(num_points):
-                if i != j:
-                    dist_matrix[i, j] = np.sqrt(
-                        (self.pvt_data.iloc[i]['AVG_DOWNHOLE_PRESSURE'] - self.pvt_data.iloc[j]['AVG_DOWNHOLE_PRESSURE']) ** 2 +
-                        (self.pvt_data.iloc[i]['AVG_DOWNHOLE_TEMPERATURE'] - self.pvt_data.iloc[j]['AVG_DOWNHOLE_TEMPERATURE']) ** 2 +
-                        (self.pvt_data.iloc[i]['AVG_ANNULUS_PRESS'] - self.pvt_data.iloc[j]['AVG_ANNULUS_PRESS']) ** 2 +
-                        (self.pvt_data.iloc[i]['AVG_CHOKE_SIZE_P'] - self.pvt_data.iloc[j]['AVG_CHOKE_SIZE_P']) ** 2 +
-                        (self.pvt_data.iloc[i]['Calculated_GOR'] - self.pvt_data.iloc[j]['Calculated_GOR']) ** 2 
-                    )
-        return dist_matrix
+        out = matrix_storage.allocate((num_points, num_points), self.distance_dtype, self.storage_dir, 'distance')
+        return pairwise_distances(self.feature_array(), metric='euclidean', out=out,
+                                  memory_budget=self.memory_budget or matrix_storage.DEFAULT_BLOCK_BUDGET)
+
+    def add_points(self, new_data):
+        """Add new production records, extending the matrices and the best path instead of starting over.
+
+        Call run() afterwards (usually with fewer iterations) to refine the warm-started colony.
+        """
+        if self.standardize:
+            # Standardized features depend on every record, so all distances would change
+            raise ValueError("add_points cannot be used with standardize=True; build a new colony instead")
+        return incremental.add_points(self, new_data, lambda data: column_array(data, DISTANCE_COLUMNS), 'euclidean')
 
     def run(self):
+        if self.exact_solution is not None:
+            return self.use_exact_solution()
+        if self.stopping is not None:
+            self.stopping.reset()
+        self.stop_reason = 'max_iterations'
+        self.history = []
+        if self.tracer is not None:
+            self.tracer.start()
         # Using tqdm to wrap the iteration range for progress monitoring
-        for iteration in tqdm(range(self.num_iterations), desc="ACO Progress"):
-            ants_paths = self.generate_ant_paths()
-            self.update_pheromone(ants_paths)
-            shortest_path, shortest_cost = self.get_shortest_path(ants_paths)
-            
-            if shortest_cost < self.shortest_cost:
-                self.shortest_path = shortest_path
-                self.shortest_cost = shortest_cost
-                
-            # Printing the current iteration and shortest cost for monitoring
-            tqdm.write(f"Iteration {iteration + 1}/{self.num_iterations}: Shortest Cost = {self.shortest_cost:.2f}")
-            
-        gor_values = [self.pvt_data.iloc[i]['Calculated_GOR'] for i in self.shortest_path]
+        with parallel_colony.path_builder(self) as generate_ant_paths:
+            progress = tqdm(range(self.num_iterations), desc="ACO Progress")
+            for iteration in progress:
+                self.run_iteration(iteration + 1, generate_ant_paths)
+
+                # The shortest cost is shown on the progress bar, which only redraws a few times a second;
+                # pass a tracer for per-iteration records
+                progress.set_postfix(shortest_cost=f"{self.shortest_cost:.2f}", refresh=False)
+
+                if self.stopping is not None:
+                    pheromone = self.pheromone_matrix if self.candidate_k is None else self.candidate_pheromone
+                    reason = self.stopping.check(iteration + 1, self.shortest_cost, pheromone)
+                    if reason is not None:
+                        self.stop_reason = reason
+                        break
+
+        return self.results()
+
+    def run_iteration(self, iteration, generate_ant_paths=None):
+        """One iteration of run(): build, improve and deposit the ants' paths and update the shortest path.
+
+        generate_ant_paths is the function from parallel_colony.path_builder (the
+        colony's own generate_ant_paths when None). Returns the ants' paths.
+        """
+        generate_ant_paths = self.generate_ant_paths if generate_ant_paths is None else generate_ant_paths
+        timer = self.tracer.timer(iteration) if self.tracer is not None else instrumentation.NO_TIMER
+        ants_paths = generate_ant_paths()
+        timer.lap('construction')
+        if self.local_search is not None:
+            ants_paths = self.local_search.apply(self, ants_paths)
+            timer.lap('local_search')
+        self.update_pheromone(ants_paths)
+        timer.lap('pheromone')
+        shortest_path, shortest_cost = self.get_shortest_path(ants_paths)
+        timer.lap('evaluation')
+
+        if shortest_cost < self.shortest_cost:
+            self.shortest_path = shortest_path
+            self.shortest_cost = shortest_cost
+        timer.record(self, iteration, ants_paths)
+        self.history.append(self.shortest_cost)
+        self.iterations_run = iteration
+        return ants_paths
+
+    def use_exact_solution(self):
+        self.shortest_path, self.shortest_cost = self.exact_solution
+        self.history = [self.shortest_cost]
+        self.iterations_run = 0
+        self.stop_reason = 'exact'
+        return self.results()
+
+    def results(self):
+        gor_values = column_values(self.pvt_data, 'Calculated_GOR')[np.asarray(self.shortest_path)].tolist()
         return {
             'shortest_path': self.shortest_path,
             'shortest_cost': self.shortest_cost,
-            'gor_values': gor_values
+            'gor_values': gor_values,
+            'stop_reason': self.stop_reason,
+            'iterations': self.iterations_run
         }
 
     def generate_ant_paths(self):
+        if self.backend == 'numba' and self.candidate_k is None:
+            return self.generate_ant_paths_compiled()
+        if self.candidate_k is not None:
+            return [candidate_list.construct_path(self.candidates, self.candidate_heuristic, self.candidate_pheromone,
+                                                  self.features, self.alpha, self.beta, 1.0 / len(self.pvt_data))
+                    for _ in range(self.num_ants)]
         num_points = len(self.pvt_data)
         ants_paths = []
         
@@ -78,6 +194,12 @@ class AntColonyOptimization:
             ants_paths.append(path)
         return ants_paths
 
+    def generate_ant_paths_compiled(self):
+        # Weights are computed from the matrix rows inside the kernel, so no extra n x n arrays are needed
+        starts, draws = compiled_kernels.draw_random_numbers(self.num_ants, len(self.pvt_data))
+        return compiled_kernels.construct_paths_from_matrices(self.pheromone_matrix, self.distance_matrix,
+                                                              self.alpha, self.beta, starts, draws)
+
     def calculate_probabilities(self, current_point, visited):
         pheromone = self.pheromone_matrix[current_point]
         dist = self.distance_matrix[current_point]
@@ -87,12 +209,38 @@ class AntColonyOptimization:
         return probabilities
 
     def update_pheromone(self, ants_paths):
-        self.pheromone_matrix *= self.decay
+        if self.candidate_k is not None:
+            self.candidate_pheromone *= self.decay
+        elif self.lazy_evaporation:
+            # Evaporation only shrinks the global scale, so deposits are stored divided by it
+            self.pheromone_scale *= self.decay
+            if self.pheromone_scale < matrix_storage.RENORMALIZE_BELOW:
+                self.pheromone_scale = matrix_storage.renormalize(self.pheromone_matrix, self.pheromone_scale,
+                                                                  self.memory_budget)
+        else:
+            matrix_storage.scale_blockwise(self.pheromone_matrix, self.decay, self.memory_budget)
+        if self.backend == 'numba' and self.candidate_k is None:
+            compiled_kernels.deposit_pheromone(self.pheromone_matrix, self.distance_matrix, np.asarray(ants_paths),
+                                               self.pheromone_scale)
+            return
         for path in ants_paths:
-            for i in range(len(path) - 1):
-                self.pheromone_matrix[path[i], path[i + 1]] += 1.0 / self.distance_matrix[path[i], path[i + 1]]
+            self.deposit_pheromone(path)
+
+    def deposit_pheromone(self, path, weight=1.0):
+        # Every edge of the path gets weight / distance
+        path = np.asarray(path)
+        if self.candidate_k is not None:
+            distances = candidate_list.edge_distances(self.features, path[:-1], path[1:])
+            candidate_list.deposit_pheromone(self.candidates, self.candidate_pheromone, path, weight / (distances + 1e-10))
+            return
+        deposits = weight / self.distance_matrix[path[:-1], path[1:]]
+        np.add.at(self.pheromone_matrix, (path[:-1], path[1:]), deposits / self.pheromone_scale)
 
     def get_shortest_path(self, ants_paths):
+        if self.backend == 'numba' and self.candidate_k is None:
+            costs = compiled_kernels.path_costs(self.distance_matrix, np.asarray(ants_paths))
+            ant = int(np.argmin(costs))
+            return ants_paths[ant], costs[ant]
         shortest_cost = np.inf
         shortest_path = None
         for path in ants_paths:
@@ -103,6 +251,9 @@ class AntColonyOptimization:
         return shortest_path, shortest_cost
 
     def calculate_path_cost(self, path):
+        if self.candidate_k is not None:
+            path = np.asarray(path)
+            return np.sum(candidate_list.edge_distances(self.features, path[:-1], path[1:]))
         path_cost = 0
         for i in range(len(path) - 1):
             path_cost += self.distance_matrix[path[i], path[i + 1]]
@@ -0,0 +1,100 @@
+import numpy as np
+
+
+def valid_points(Pb, Tb):
+    """Mask of the data points the correlations are defined for (Pb > 0 and Tb > 460)."""
+    return (np.asarray(Pb, dtype=float) > 0) & (np.asarray(Tb, dtype=float) > 460)
+
+
+def _prepare(coefficients, Pb, Tb, gamma_g, API):
+    coefficients = np.asarray(coefficients, dtype=float)
+    single = coefficients.ndim == 1
+    coefficients = np.atleast_2d(coefficients)
+    Pb = np.asarray(Pb, dtype=float)
+    Tb = np.asarray(Tb, dtype=float)
+    gamma_g = np.asarray(gamma_g, dtype=float)
+    API = np.asarray(API, dtype=float)
+    # Points the correlations are not defined for are masked instead of raising
+    valid = valid_points(Pb, Tb)
+    return coefficients, single, Pb, Tb, gamma_g, API, valid
+
+
+def _finish(Rs, valid, single):
+    Rs = np.where(valid, Rs, np.nan)
+    return Rs[0] if single else Rs
+
+
+def glaso_correlation(coefficients, Pb, Tb, gamma_g, API):
+    """Glaso solution GOR for many coefficient sets at once.
+
+    coefficients is (num_sets, 7) holding alpha_1..alpha_7 (or a single set of 7),
+    Pb and Tb are (n_points,) arrays in psia and degrees Rankine, gamma_g and API are
+    scalars or (n_points,) arrays. Returns Rs as (num_sets, n_points) (or (n_points,)
+    for a single set). Points with Pb <= 0 or Tb <= 460 are NaN.
+    """
+    coefficients, single, Pb, Tb, gamma_g, API, valid = _prepare(coefficients, Pb, Tb, gamma_g, API)
+    a1, a2, a3, a4, a5, a6, a7 = (column[:, None] for column in coefficients.T)
+    with np.errstate(all='ignore'):
+        log_Pb = np.log10(np.where(valid, Pb, 1.0))
+        x = np.clip((a4 - (a5 - a6 * log_Pb)) ** a7, -10, 10)
+        Rs = gamma_g * ((API ** a1) / ((np.where(valid, Tb, 461.0) - 460) ** a2) * 10 ** x) ** a3
+    return _finish(Rs, valid, single)
+
+
+def standing_correlation(coefficients, Pb, Tb, gamma_g, API):
+    """Standing solution GOR for many coefficient sets at once.
+
+    coefficients is (num_sets, 4) holding alpha_1..alpha_4 (or a single set of 4);
+    the other arguments and the result are as for glaso_correlation.
+    """
+    coefficients, single, Pb, Tb, gamma_g, API, valid = _prepare(coefficients, Pb, Tb, gamma_g, API)
+    a1, a2, a3, a4 = (column[:, None] for column in coefficients.T)
+    with np.errstate(all='ignore'):
+        x = np.clip((a3 * API) - (0.00091 * Tb), -10, 10)
+        Rs = gamma_g * ((((Pb / a1) + a2) * (10 ** x)) ** a4)
+    return _finish(Rs, valid, single)
+
+
+def mean_absolute_error(Rs, GOR_data, valid=None):
+    """MAE of each row of Rs against GOR_data over the valid points.
+
+    Coefficient sets that give NaN or infinite Rs at a valid point get an
+    infinite error so they can never be chosen as the best solution.
+    """
+    Rs = np.atleast_2d(Rs)
+    GOR_data = np.asarray(GOR_data, dtype=float)
+    if valid is None:
+        valid = np.ones(Rs.shape[1], dtype=bool)
+    if not valid.any():
+        return np.full(len(Rs), np.inf)
+    with np.errstate(all='ignore'):
+        mae = np.mean(np.abs(Rs[:, valid] - GOR_data[valid]), axis=1)
+    return np.where(np.isfinite(mae), mae, np.inf)
+
+
+def glaso_objective(coefficients, Pb_data, Tb_data, GOR_data, gamma_g, API):
+    """MAE of the Glaso correlation for every coefficient set (one row per ant)."""
+    Rs = glaso_correlation(coefficients, Pb_data, Tb_data, gamma_g, API)
+    return mean_absolute_error(Rs, GOR_data, valid_points(Pb_data, Tb_data))
+
+
+def standing_objective(coefficients, Pb_data, Tb_data, GOR_data, gamma_g, API):
+    """MAE of the Standing correlation for every coefficient set (one row per ant)."""
+    Rs = standing_correlation(coefficients, Pb_data, Tb_data, gamma_g, API)
+    return mean_absolute_error(Rs, GOR_data, valid_points(Pb_data, Tb_data))
+
+
+# Correlation models the coefficient fitters can plug in, with the coefficient
+# search bounds used by the ACO notebooks
+CORRELATION_MODELS = {
+    'glaso': {
+        'correlation': glaso_correlation,
+        'num_coefficients': 7,
+        'bounds': [(0, 10), (0, 5), (0, 2), (0, 5), (0, 5), (0, 5), (0, 2)],
+    },
+    'standing': {
+        'correlation': standing_correlation,
+        'num_coefficients': 4,
+        'bounds': [(0, 10), (0, 5), (0, 2), (0, 5)],
+    },
+}
@@ -1,9 +1,11 @@
 from sklearn.linear_model import LinearRegression
 import numpy as np
 
+from pvt_Data.pvt_dataset import column_array, column_values
+
 def fit_linear_regression_model(pvt_data):
-    X = np.array([[data['bubble_point_pressure'], data['api_gravity'], data['gas_gravity'], data['reservoir_temperature']] for data in pvt_data])
-    y = np.array([data['actual_gor'] for data in pvt_data])
+    X = column_array(pvt_data, ['bubble_point_pressure', 'api_gravity', 'gas_gravity', 'reservoir_temperature'])
+    y = column_values(pvt_data, 'actual_gor')
     
     model = LinearRegression()
     model.fit(X, y)
@@ -16,3 +18,7 @@ def predict_gor(model, bubble_point_pressure, api_gravity, gas_gravity, reservoi
     except Exception as e:
         print(f"Error: {e}")
         return None
+
+def predict_gor_batch(model, X):
+    # X is an (m, 4) array of (bubble point pressure, API gravity, gas gravity, reservoir temperature) rows
+    return model.predict(np.asarray(X, dtype=float))
@@ -0,0 +1,129 @@
+import argparse
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Adding the parent directory of 'AntColony_PyCode' to the sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from AntColony_PyCode.continuous_aco import fit_correlation
+from AntColony_PyCode.gor_predictor import PARAMETERS, get_predictor
+from Correlation_Module.correlations import CORRELATION_MODELS
+from Linear_Regression_Module.linear_regression_model import fit_linear_regression_model, predict_gor_batch
+from pvt_Data.pvt_data import pvt_data
+from pvt_Data.pvt_dataset import column_values
+
+MODELS = ['aco', 'linear', 'glaso', 'standing']
+
+
+def build_scorer(model, pvt_data, coefficients=None):
+    """Return a function mapping an (m, 4) array of (Pb, API, gas gravity, T in F) rows to GOR."""
+    if model == 'aco':
+        predictor = get_predictor(pvt_data, num_ants=20, num_iterations=200, decay=0.95, alpha=1.0, beta=2.0)
+        return predictor.predict
+    if model == 'linear':
+        regression = fit_linear_regression_model(pvt_data)
+        return lambda X: predict_gor_batch(regression, X)
+    if model in CORRELATION_MODELS:
+        correlation = CORRELATION_MODELS[model]['correlation']
+        if coefficients is None:
+            # Fit the coefficients on the reference PVT data (temperatures converted to Rankine)
+            Pb = column_values(pvt_data, 'bubble_point_pressure')
+            Tb = column_values(pvt_data, 'reservoir_temperature') + 460
+            gor = column_values(pvt_data, 'actual_gor')
+            gamma_g = column_values(pvt_data, 'gas_gravity')
+            API = column_values(pvt_data, 'api_gravity')
+            coefficients, _, _ = fit_correlation(model, Pb, Tb, gor, gamma_g, API, num_iterations=2000, seed=0)
+
+        def score(X):
+            return correlation(coefficients, X[:, 0], X[:, 3] + 460, X[:, 2], X[:, 1])
+        return score
+    raise ValueError(f"Unknown model {model!r}, expected one of {MODELS}")
+
+
+def read_chunks(path, chunk_size):
+    """Yield DataFrames of at most chunk_size rows from a CSV or Parquet file.
+
+    The model's input columns are read from CSV as float64, so a chunk whose values
+    happen to be whole numbers does not come out with a different dtype than the rest.
+    """
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size, dtype={name: 'float64' for name in PARAMETERS})
+
+
+class ChunkWriter:
+    """Appends DataFrames to a CSV or Parquet file one chunk at a time.
+
+    Every Parquet chunk is cast to the schema of the first one, so the types pandas
+    infers per chunk cannot differ within the file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.parquet_writer = None
+        self.rows_written = 0
+
+    def write(self, frame):
+        if self.path.endswith('.parquet'):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self.parquet_writer is None:
+                self.parquet_writer = pq.ParquetWriter(self.path, table.schema)
+            else:
+                table = table.cast(self.parquet_writer.schema)
+            self.parquet_writer.write_table(table)
+        else:
+            frame.to_csv(self.path, mode='w' if self.rows_written == 0 else 'a', header=self.rows_written == 0,
+                         index=False)
+        self.rows_written += len(frame)
+
+    def close(self):
+        if self.parquet_writer is not None:
+            self.parquet_writer.close()
+
+
+def score_file(input_path, output_path, model='aco', chunk_size=100_000, coefficients=None, pvt_data=pvt_data):
+    """Score every row of input_path with the chosen model and write the rows plus a predicted_gor column.
+
+    The input is read and written chunk by chunk, so memory use does not grow with the file size.
+    Returns the number of rows written.
+    """
+    scorer = build_scorer(model, pvt_data, coefficients)
+    writer = ChunkWriter(output_path)
+    try:
+        for chunk in read_chunks(input_path, chunk_size):
+            missing = [name for name in PARAMETERS if name not in chunk.columns]
+            if missing:
+                raise ValueError(f"Input is missing the columns {missing}")
+            X = chunk[PARAMETERS].to_numpy(dtype=float)
+            chunk['predicted_gor'] = scorer(X)
+            writer.write(chunk)
+    finally:
+        writer.close()
+    return writer.rows_written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Predict GOR for every row of a CSV or Parquet file.")
+    parser.add_argument('input', help="CSV or Parquet file with columns " + ", ".join(PARAMETERS))
+    parser.add_argument('output', help="CSV or Parquet file to write, with an added predicted_gor column")
+    parser.add_argument('--model', choices=MODELS, default='aco')
+    parser.add_argument('--chunk-size', type=int, default=100_000)
+    parser.add_argument('--coefficients', help="Comma-separated Glaso/Standing coefficients instead of fitting them")
+    args = parser.parse_args()
+
+    coefficients = None
+    if args.coefficients:
+        coefficients = np.array([float(value) for value in args.coefficients.split(',')])
+    rows = score_file(args.input, args.output, args.model, args.chunk_size, coefficients)
+    print(f"Scored {rows} rows with the {args.model} model into {args.output}")
+
+
+if __name__ == "__main__":
+    main()
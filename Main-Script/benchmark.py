@@ -0,0 +1,369 @@
+import argparse
+import cProfile
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+
+# Adding the parent directory of 'AntColony_PyCode' to the sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from AntColony_PyCode import compiled_kernels, correlation_aco
+from AntColony_PyCode.ant_colony_optimization import AntColonyOptimization
+from AntColony_PyCode.exact_path import sorted_path
+from AntColony_PyCode.gor_predictor import PARAMETERS, ACOGORPredictor
+from Correlation_Module.correlations import CORRELATION_MODELS, glaso_objective, standing_objective
+from Linear_Regression_Module.linear_regression_model import fit_linear_regression_model, predict_gor_batch
+from pvt_Data.production_data import load_dataset
+from pvt_Data.pvt_data import pvt_data
+from pvt_Data.pvt_dataset import PVTDataset, column_array, column_values
+
+DEFAULT_SIZES = ['pvt', '100', '1000', '3805']
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+# Whether a smaller or a larger value of each quality metric is better
+QUALITY_DIRECTION = {'cost_ratio': 'lower', 'mae': 'lower', 'r2': 'higher', 'best_mae': 'lower'}
+
+
+def benchmark_data(size, seed=0):
+    """The PVT records for one benchmark size.
+
+    'pvt' is the 10-row pvt_data. A number n takes n rows of cleaned_production_data.csv
+    (a fixed random sample) as PVT records: downhole pressure in psia as the bubble point
+    pressure, downhole temperature in F and the GOR in scf/STB. The production data has
+    no API or gas gravity, so those are drawn around the pvt_data values with a fixed seed.
+    """
+    if size == 'pvt':
+        return PVTDataset.from_records(pvt_data)
+    production = load_dataset('cleaned_production', ['AVG_DOWNHOLE_PRESSURE', 'AVG_DOWNHOLE_TEMPERATURE',
+                                                     'Calculated_GOR'])
+    size = int(size)
+    if size > len(production):
+        raise ValueError(f"cleaned_production_data.csv has only {len(production)} rows")
+    rng = np.random.default_rng(seed)
+    rows = np.sort(rng.permutation(len(production))[:size])
+    sample = production[rows]
+    return PVTDataset({
+        'bubble_point_pressure': sample['AVG_DOWNHOLE_PRESSURE'] * 14.5038,
+        'api_gravity': rng.normal(37.0, 3.0, size),
+        'gas_gravity': rng.normal(0.743, 0.03, size),
+        'reservoir_temperature': sample['AVG_DOWNHOLE_TEMPERATURE'] * 9 / 5 + 32,
+        'actual_gor': sample['Calculated_GOR'] * 5.615,
+    })
+
+
+def _cost_ratio(data, paths):
+    """Best path cost over the exact (pressure-sorted) optimum."""
+    pressures = column_values(data, 'bubble_point_pressure')
+    _, optimum = sorted_path(pressures, 'l1')
+    best = min(np.abs(np.diff(pressures[np.asarray(path)])).sum() for path in paths)
+    return {'cost_ratio': float(best / optimum) if optimum > 0 else 1.0}
+
+
+def _prediction_quality(data, predictions):
+    actual = column_values(data, 'actual_gor')
+    residual = predictions - actual
+    return {'mae': float(np.mean(np.abs(residual))),
+            'r2': float(1 - np.sum(residual ** 2) / np.sum((actual - actual.mean()) ** 2))}
+
+
+def _objective_arguments(data):
+    # Temperatures in Rankine as the correlations expect
+    return (column_values(data, 'bubble_point_pressure'), column_values(data, 'reservoir_temperature') + 460,
+            column_values(data, 'actual_gor'), column_values(data, 'gas_gravity'), column_values(data, 'api_gravity'))
+
+
+def _coefficient_sets(model, num_sets=50, seed=0):
+    bounds = np.array(CORRELATION_MODELS[model]['bounds'], dtype=float)
+    return np.random.default_rng(seed).uniform(bounds[:, 0], bounds[:, 1], (num_sets, len(bounds)))
+
+
+def _constant_correlation_columns(data):
+    """Why the correlation colony cannot run on data, or None when it can.
+
+    Its distance weights each parameter by its correlation with actual_gor, which is
+    undefined for a constant column (as api_gravity, gas_gravity and the temperature
+    are in the 10-row pvt_data).
+    """
+    constant = correlation_aco.constant_columns(data)
+    return f"constant {', '.join(constant)}" if constant else None
+
+
+# Each case prepares its inputs from the data (untimed) and returns the function to time
+# and a function turning its result into quality metrics. max_rows skips sizes the case
+# would take minutes on; skip, when set, returns the reason the case cannot run on the
+# data, or None when it can.
+def case_aco_init(data):
+    return lambda: AntColonyOptimization(data, construction='vectorized'), None
+
+
+def case_generate_ant_paths_scalar(data):
+    colony = AntColonyOptimization(data, num_ants=5)
+    return colony.generate_ant_paths, lambda paths: _cost_ratio(data, paths)
+
+
+def case_generate_ant_paths_vectorized(data):
+    colony = AntColonyOptimization(data, num_ants=10, construction='vectorized')
+    return colony.generate_ant_paths, lambda paths: _cost_ratio(data, paths)
+
+
+def case_generate_ant_paths_compiled(data):
+    # Numba kernels when installed, otherwise the NumPy path; the untimed first call loads or compiles them
+    colony = AntColonyOptimization(data, num_ants=10, construction='vectorized', backend='auto')
+    state = np.random.get_state()
+    colony.generate_ant_paths()
+    # Same random numbers as the vectorized case, so the quality can be compared
+    np.random.set_state(state)
+    return colony.generate_ant_paths, lambda paths: _cost_ratio(data, paths)
+
+
+def case_update_pheromone(data):
+    colony = AntColonyOptimization(data, num_ants=10, construction='vectorized')
+    paths = colony.generate_ant_paths()
+    return lambda: colony.update_pheromone(paths), None
+
+
+def case_update_pheromone_compiled(data):
+    colony = AntColonyOptimization(data, num_ants=10, construction='vectorized', backend='auto')
+    paths = colony.generate_ant_paths()
+    colony.update_pheromone(paths)
+    return lambda: colony.update_pheromone(paths), None
+
+
+def case_correlation_select_next_node(data):
+    colony = correlation_aco.AntColonyOptimization(data)
+    visited = np.zeros(len(data), dtype=bool)
+    visited[0] = True
+    return lambda: colony.select_next_node(0, visited), None
+
+
+def case_correlation_colony_run(data):
+    def run():
+        return correlation_aco.AntColonyOptimization(data, num_ants=5, num_iterations=2).run()[0]
+    return run, lambda path: _cost_ratio(data, [path])
+
+
+def _predictor_case(data, **params):
+    X = column_array(data, PARAMETERS)
+
+    def run():
+        return ACOGORPredictor(**params).fit(data).predict(X)
+    return run, lambda predictions: _prediction_quality(data, predictions)
+
+
+def case_predict_gor_with_aco(data):
+    # The ant-colony path of the fitted predictor, with a short run so it finishes at 1000 rows
+    return _predictor_case(data, num_ants=10, num_iterations=5, solver='colony', construction='vectorized')
+
+
+def case_predict_gor_with_exact_path(data):
+    # The app's path: the predictor's default solver, which returns the exact sorted path for this distance
+    return _predictor_case(data)
+
+
+def case_fit_linear_regression_model(data):
+    X = column_array(data, PARAMETERS)
+    return (lambda: fit_linear_regression_model(data),
+            lambda model: _prediction_quality(data, predict_gor_batch(model, X)))
+
+
+def case_glaso_objective(data):
+    coefficients = _coefficient_sets('glaso')
+    arguments = _objective_arguments(data)
+    return lambda: glaso_objective(coefficients, *arguments), lambda mae: {'best_mae': float(np.min(mae))}
+
+
+def case_standing_objective(data):
+    coefficients = _coefficient_sets('standing')
+    arguments = _objective_arguments(data)
+    return lambda: standing_objective(coefficients, *arguments), lambda mae: {'best_mae': float(np.min(mae))}
+
+
+CASES = {
+    'aco_init': {'setup': case_aco_init, 'max_rows': None, 'skip': None},
+    'generate_ant_paths_scalar': {'setup': case_generate_ant_paths_scalar, 'max_rows': 1000, 'skip': None},
+    'generate_ant_paths_vectorized': {'setup': case_generate_ant_paths_vectorized, 'max_rows': None, 'skip': None},
+    'generate_ant_paths_compiled': {'setup': case_generate_ant_paths_compiled, 'max_rows': None, 'skip': None},
+    'update_pheromone': {'setup': case_update_pheromone, 'max_rows': None, 'skip': None},
+    'update_pheromone_compiled': {'setup': case_update_pheromone_compiled, 'max_rows': None, 'skip': None},
+    'correlation_select_next_node': {'setup': case_correlation_select_next_node, 'max_rows': None,
+                                     'skip': _constant_correlation_columns},
+    'correlation_colony_run': {'setup': case_correlation_colony_run, 'max_rows': 1000,
+                               'skip': _constant_correlation_columns},
+    'predict_gor_with_aco': {'setup': case_predict_gor_with_aco, 'max_rows': 1000, 'skip': None},
+    'predict_gor_with_exact_path': {'setup': case_predict_gor_with_exact_path, 'max_rows': None, 'skip': None},
+    'fit_linear_regression_model': {'setup': case_fit_linear_regression_model, 'max_rows': None, 'skip': None},
+    'glaso_objective': {'setup': case_glaso_objective, 'max_rows': None, 'skip': None},
+    'standing_objective': {'setup': case_standing_objective, 'max_rows': None, 'skip': None},
+}
+
+
+def measure(function, repeat=5, time_budget=2.0, profile_path=None):
+    """Time function (best of up to repeat runs within time_budget seconds) and trace its peak memory.
+
+    The memory is traced in a separate first run because tracemalloc slows the code down.
+    Returns (best wall time in seconds, peak traced memory in bytes, result of the first run),
+    so the result depends only on the random seed set before the call.
+    """
+    tracemalloc.start()
+    try:
+        result = function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+        if sum(times) > time_budget:
+            break
+    if profile_path is not None:
+        profiler = cProfile.Profile()
+        profiler.runcall(function)
+        profiler.dump_stats(profile_path)
+    return min(times), peak, result
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, cases=None, repeat=5, time_budget=2.0, profile_dir=None):
+    """Run every case at every size; returns the list of result records."""
+    results = []
+    for size in sizes:
+        data = benchmark_data(size)
+        for name in cases or CASES:
+            record = {'case': name, 'size': size, 'rows': len(data)}
+            max_rows, skip = CASES[name]['max_rows'], CASES[name]['skip']
+            if max_rows is not None and len(data) > max_rows:
+                record['skipped'] = f"more than {max_rows} rows"
+            elif skip is not None and skip(data) is not None:
+                record['skipped'] = skip(data)
+            if 'skipped' in record:
+                results.append(record)
+                continue
+            # The correlation colony draws its start nodes from the random module
+            np.random.seed(0)
+            random.seed(0)
+            try:
+                function, quality = CASES[name]['setup'](data)
+                profile_path = None if profile_dir is None else os.path.join(profile_dir, f'{name}-{size}.prof')
+                seconds, peak, result = measure(function, repeat, time_budget, profile_path)
+            except Exception as error:  # A failing case is reported instead of stopping the suite
+                record['error'] = f"{type(error).__name__}: {error}"
+            else:
+                record['wall_time_s'] = seconds
+                record['peak_memory_mb'] = peak / 2**20
+                record['quality'] = quality(result) if quality is not None else {}
+            results.append(record)
+            print(format_record(record), flush=True)
+    return results
+
+
+def format_record(record):
+    label = f"{record['case']:<32} {str(record['size']):>5}"
+    if 'skipped' in record:
+        return f"{label}  skipped ({record['skipped']})"
+    if 'error' in record:
+        return f"{label}  error: {record['error']}"
+    quality = ', '.join(f"{key}={value:.4g}" for key, value in record['quality'].items())
+    return f"{label}  {record['wall_time_s'] * 1e3:10.3f} ms  {record['peak_memory_mb']:9.2f} MiB  {quality}"
+
+
+def compare(results, baseline, tolerance=0.25, min_memory_mb=1.0):
+    """List the regressions of results against baseline results.
+
+    Wall time or peak memory more than tolerance (a fraction) above the baseline is a
+    regression, ignoring memory differences under min_memory_mb; so is any quality
+    metric that got worse, and a case that now fails.
+    """
+    previous = {(record['case'], str(record['size'])): record for record in baseline}
+    regressions = []
+    for record in results:
+        old = previous.get((record['case'], str(record['size'])))
+        if old is None or 'skipped' in record or 'error' in old:
+            continue
+        label = f"{record['case']} at size {record['size']}"
+        if 'error' in record:
+            regressions.append(f"{label} fails: {record['error']}")
+            continue
+        if 'skipped' in old:
+            continue
+        if record['wall_time_s'] > old['wall_time_s'] * (1 + tolerance):
+            regressions.append(f"{label}: wall time {record['wall_time_s'] * 1e3:.3f} ms "
+                               f"vs {old['wall_time_s'] * 1e3:.3f} ms")
+        if (record['peak_memory_mb'] > old['peak_memory_mb'] * (1 + tolerance)
+                and record['peak_memory_mb'] - old['peak_memory_mb'] > min_memory_mb):
+            regressions.append(f"{label}: peak memory {record['peak_memory_mb']:.2f} MiB "
+                               f"vs {old['peak_memory_mb']:.2f} MiB")
+        for key, value in record['quality'].items():
+            if key not in old.get('quality', {}):
+                continue
+            worse = value - old['quality'][key]
+            if QUALITY_DIRECTION.get(key) == 'higher':
+                worse = -worse
+            if worse > 1e-9 * max(1.0, abs(old['quality'][key])):
+                regressions.append(f"{label}: {key} {value:.6g} vs {old['quality'][key]:.6g}")
+    return regressions
+
+
+def environment():
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        # The *_compiled cases use NumPy when this is None
+        'numba': None if compiled_kernels.numba is None else compiled_kernels.numba.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the ACO, correlation and prediction hot paths.")
+    parser.add_argument('--sizes', nargs='+', default=DEFAULT_SIZES,
+                        help="'pvt' for the 10-row pvt_data, or a number of cleaned production rows")
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), help="Cases to run (default: all)")
+    parser.add_argument('--repeat', type=int, default=5, help="Timed runs per case (the best one is kept)")
+    parser.add_argument('--time-budget', type=float, default=2.0, help="Seconds after which a case stops repeating")
+    parser.add_argument('--output', default='benchmark_results.json', help="JSON file for the results")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Results JSON to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed slowdown or memory growth (fraction)")
+    parser.add_argument('--update-baseline', action='store_true', help="Store these results as the new baseline")
+    parser.add_argument('--profile-dir', help="Write a cProfile .prof file per case and size into this directory")
+    args = parser.parse_args()
+
+    if args.profile_dir:
+        os.makedirs(args.profile_dir, exist_ok=True)
+    results = run_benchmarks(args.sizes, args.cases, args.repeat, args.time_budget, args.profile_dir)
+    report = {'environment': environment(), 'results': results}
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=1)
+    print(f"Results written to {args.output}")
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=1)
+        print(f"Baseline updated in {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline to store one (see the README for CI)")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline['results'], args.tolerance)
+    if regressions:
+        print(f"{len(regressions)} regression(s) against {args.baseline}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print(f"No regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,8 @@ import numpy as np
 # Adding the parent directory of 'Linear_Regression_Module' to the sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from AntColony_PyCode.ant_colony_optimization import AntColonyOptimization
+from AntColony_PyCode.gor_predictor import get_predictor
+from AntColony_PyCode.result_cache import ResultCache
 from pvt_Data.pvt_data import pvt_data
 
 def predict_gor_with_aco(pvt_data, bubble_point_pressure, api_gravity, gas_gravity, reservoir_temperature):
@@ -16,32 +17,13 @@ def predict_gor_with_aco(pvt_data, bubble_point_pressure, api_gravity, gas_gravi
     alpha = 1.0
     beta = 2.0
 
-    # Implement a new ACO instance and run
-    aco = AntColonyOptimization(pvt_data, num_ants=num_ants, num_iterations=num_iterations, decay=decay, alpha=alpha, beta=beta)
-    shortest_path, _ = aco.run()
+    # The colony only runs the first time a dataset is seen (results are also cached on disk);
+    # later queries reuse its shortest path
+    predictor = get_predictor(pvt_data, cache=ResultCache(), num_ants=num_ants, num_iterations=num_iterations,
+                              decay=decay, alpha=alpha, beta=beta)
 
-    # Extract GOR values corresponding to the optimized parameters from the shortest path found
-    optimized_gor_values = [pvt_data[i]['actual_gor'] for i in shortest_path]
-
-    # Calculate a weighted predicted GOR based on the distance from the input parameters
-    weights = []
-    for i in shortest_path:
-        distance = (
-            abs(bubble_point_pressure - pvt_data[i]['bubble_point_pressure']) +
-            abs(api_gravity - pvt_data[i]['api_gravity']) +
-            abs(gas_gravity - pvt_data[i]['gas_gravity']) +
-            abs(reservoir_temperature - pvt_data[i]['reservoir_temperature'])
-        )
-        weights.append(1 / (1 + distance))  # Weight inversely proportional to distance
-
-    # Normalize weights
-    total_weight = sum(weights)
-    normalized_weights = [w / total_weight for w in weights]
-
-    # Calculate the weighted average of the GOR values
-    predicted_gor = sum(g * w for g, w in zip(optimized_gor_values, normalized_weights))
-
-    return predicted_gor
+    # Weighted average of the GOR values along the shortest path, weights inversely proportional to distance
+    return predictor.predict_one(bubble_point_pressure, api_gravity, gas_gravity, reservoir_temperature)
 
 def main():
     # Example usage for new input values
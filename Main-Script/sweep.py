@@ -0,0 +1,59 @@
+import argparse
+import json
+import sys
+import os
+
+# Adding the parent directory of 'AntColony_PyCode' to the sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from AntColony_PyCode.hyperparameter_sweep import SAMPLERS, TARGETS, TrialCache, run_sweep
+from pvt_Data.production_data import load_csv
+from pvt_Data.pvt_data import pvt_data
+from pvt_Data.pvt_dataset import PVTDataset
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune the ACO hyperparameters instead of hard-coding them.")
+    parser.add_argument('--target', choices=list(TARGETS), default='colony')
+    parser.add_argument('--sampler', choices=list(SAMPLERS), default='lhs',
+                        help="'grid' needs --space with a list of choices for every parameter")
+    parser.add_argument('--space', help="JSON search space, e.g. '{\"alpha\": [1.0, 2.0], \"decay\": [0.8, 0.99]}'; "
+                                        "lists are choices, two-element arrays ranges (default: the target's space)")
+    parser.add_argument('--trials', type=int, default=20, help="Settings drawn by 'random' and 'lhs'")
+    parser.add_argument('--iterations', type=int, help="Iterations of a full trial (default: the target's)")
+    parser.add_argument('--min-iterations', type=int,
+                        help="Start successive halving at this many iterations (default: no halving)")
+    parser.add_argument('--eta', type=int, default=3, help="Keep the best 1/eta of the trials at every rung")
+    parser.add_argument('--workers', type=int, help="Processes to run the trials on")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data', help="CSV of PVT records (default: pvt_Data/pvt_data.py)")
+    parser.add_argument('--cache-dir', help="Directory of the trial cache")
+    parser.add_argument('--output', default='sweep_leaderboard.csv', help="CSV file for the leaderboard")
+    args = parser.parse_args()
+
+    space = None
+    if args.space:
+        # JSON has no tuples, so two-element arrays of numbers are read as ranges
+        space = {name: tuple(spec) if len(spec) == 2 and not isinstance(spec[0], str) and args.sampler != 'grid'
+                 else spec for name, spec in json.loads(args.space).items()}
+    data = PVTDataset.from_records(pvt_data) if args.data is None else load_csv(args.data)
+    cache = TrialCache() if args.cache_dir is None else TrialCache(args.cache_dir)
+    try:
+        sweep = run_sweep(args.target, data, space, args.sampler, args.trials, args.iterations, args.min_iterations,
+                          args.eta, args.workers, args.seed, cache, args.output)
+    except ValueError as error:
+        parser.error(str(error))
+
+    for rank, row in enumerate(sweep['leaderboard'][:10], start=1):
+        params = ", ".join(f"{name}={value:.4g}" if isinstance(value, float) else f"{name}={value}"
+                           for name, value in row['params'].items())
+        flags = " (cached)" if row['cached'] else ""
+        flags += " *" if row['pareto'] else ""
+        flags += f" [{row['error']}]" if 'error' in row else ""
+        print(f"{rank:>3}. cost={row['cost']:.6g} time={row['runtime_s']:.3f}s "
+              f"iterations={row['num_iterations']} {params}{flags}")
+    print(f"Leaderboard of {len(sweep['leaderboard'])} trials written to {args.output} (* = cost/runtime Pareto front)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,3 @@
-import pandas as pd
 import sys
 import os
 
@@ -6,23 +5,25 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from AntColony_PyCode.volvo_aco_algorithm import AntColonyOptimization
+from AntColony_PyCode.result_cache import run_cached
 from Linear_Regression_Module.linear_regression_model import fit_linear_regression_model, predict_gor
+from pvt_Data.production_data import load_dataset
 
-# Load the data from CSV
-pvt_data_df = pd.read_csv("C:/Users/hp/Documents/GitHub/ACO-Algorithm-For-Solution-Gas-Oil-Ratio-PVT-Correlation/pvt_Data/cleaned_production_data.csv")
+# Load the production data (parsed once, then read from the cached column store)
+pvt_data_df = load_dataset('cleaned_production').to_dataframe()
 
 # Sample 50 rows from the DataFrame
 sampled_data_df = pvt_data_df.sample(n=100, random_state=1)
 
 print(sampled_data_df)
 
-# Create ACO instance and run
-aco = AntColonyOptimization(sampled_data_df, num_ants=10, num_iterations=100, decay=0.95, alpha=1, beta=2)
-results = aco.run()
+# Run ACO, or load the result of an earlier run on the same sample with the same parameters
+results = run_cached(sampled_data_df, colony_class=AntColonyOptimization, num_ants=10, num_iterations=100, decay=0.95,
+                     alpha=1, beta=2)
 
 # Output the results
 shortest_path_indices = results['shortest_path']
-aco_gor_values = results['gor_values']
+aco_gor_values = [sampled_data_df.iloc[i]['Calculated_GOR'] for i in shortest_path_indices]
 
 # Extract actual GOR values from the sampled DataFrame using shortest path indices
 actual_gor_values = [sampled_data_df.iloc[i]['Calculated_GOR'] for i in shortest_path_indices]
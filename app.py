@@ -1,17 +1,24 @@
 import pandas as pd
 import streamlit as st
-import matplotlib.pyplot as plt
-import nbformat
-from nbconvert import HTMLExporter
 import sys
 import os
+import glob
 
 
-from AntColony_PyCode.ant_colony_optimization import AntColonyOptimization
-from Linear_Regression_Module.linear_regression_model import fit_linear_regression_model, predict_gor
+from AntColony_PyCode.gor_predictor import get_predictor
+from AntColony_PyCode.result_cache import ResultCache
 # getting PVT data
 from pvt_Data.pvt_data import pvt_data
 
+# Rendered notebooks are kept here, keyed by notebook path and modification time
+NOTEBOOK_HTML_DIR = '.notebook_html'
+
+# The fitted predictor is shared by every rerun and session of the app
+@st.cache_resource(show_spinner="Fitting the ACO model...")
+def load_aco_predictor(pvt_data, num_ants, num_iterations, decay, alpha, beta):
+    return get_predictor(pvt_data, cache=ResultCache(), num_ants=num_ants, num_iterations=num_iterations,
+                         decay=decay, alpha=alpha, beta=beta)
+
 def predict_gor_with_aco(pvt_data, bubble_point_pressure, api_gravity, gas_gravity, reservoir_temperature):
     # Adjust ACO parameters for better tuning
     num_ants = 20  # Increase number of ants for better exploration
@@ -20,42 +27,42 @@ def predict_gor_with_aco(pvt_data, bubble_point_pressure, api_gravity, gas_gravi
     alpha = 1.0
     beta = 2.0
 
-    # Implement a new ACO instance and run
-    aco = AntColonyOptimization(pvt_data, num_ants=num_ants, num_iterations=num_iterations, decay=decay, alpha=alpha, beta=beta)
-    shortest_path, _ = aco.run()
-
-    # Extract GOR values corresponding to the optimized parameters from the shortest path found
-    optimized_gor_values = [pvt_data[i]['actual_gor'] for i in shortest_path]
-
-    # Calculate a weighted predicted GOR based on the distance from the input parameters
-    weights = []
-    for i in shortest_path:
-        distance = (
-            abs(bubble_point_pressure - pvt_data[i]['bubble_point_pressure']) +
-            abs(api_gravity - pvt_data[i]['api_gravity']) +
-            abs(gas_gravity - pvt_data[i]['gas_gravity']) +
-            abs(reservoir_temperature - pvt_data[i]['reservoir_temperature'])
-        )
-        weights.append(1 / (1 + distance))  # Weight inversely proportional to distance
-
-    # Normalize weights
-    total_weight = sum(weights)
-    normalized_weights = [w / total_weight for w in weights]
-
-    # Calculate the weighted average of the GOR values
-    predicted_gor = sum(g * w for g, w in zip(optimized_gor_values, normalized_weights))
-
-    return predicted_gor
-
-# Function to convert notebook to HTML
-def convert_notebook_to_html(notebook_path):
+    # The colony only runs the first time a dataset is seen (results are also cached on disk);
+    # later queries reuse its shortest path
+    predictor = load_aco_predictor(pvt_data, num_ants, num_iterations, decay, alpha, beta)
+
+    # Weighted average of the GOR values along the shortest path, weights inversely proportional to distance
+    return predictor.predict_one(bubble_point_pressure, api_gravity, gas_gravity, reservoir_temperature)
+
+# Function to convert notebook to HTML, rendered once per notebook version
+@st.cache_data(show_spinner="Rendering notebook...")
+def render_notebook(notebook_path, mtime):
+    html_prefix = os.path.join(NOTEBOOK_HTML_DIR, notebook_path.replace('/', '__'))
+    html_path = f"{html_prefix}.{mtime}.html"
+    if os.path.exists(html_path):
+        with open(html_path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    # nbconvert is only imported when a notebook actually has to be rendered
+    import nbformat
+    from nbconvert import HTMLExporter
     with open(notebook_path, 'r', encoding='utf-8') as f:
         nb = nbformat.read(f, as_version=4)
     html_exporter = HTMLExporter()
     html_exporter.exclude_input = False  # Include input cells
     body, _ = html_exporter.from_notebook_node(nb)
+
+    os.makedirs(NOTEBOOK_HTML_DIR, exist_ok=True)
+    # Drop renders of older versions of this notebook
+    for old_html in glob.glob(f"{glob.escape(html_prefix)}.*.html"):
+        os.remove(old_html)
+    with open(html_path, 'w', encoding='utf-8') as f:
+        f.write(body)
     return body
 
+def convert_notebook_to_html(notebook_path):
+    return render_notebook(notebook_path, os.stat(notebook_path).st_mtime_ns)
+
 # Streamlit app structure
 st.sidebar.title("Explore")
 selected = st.sidebar.radio("Navigation", ["Introduction", "Volvo ACO Algorithm", "PVT ACO Algorithm", "Data Analysis", "GOR Calculation", "Institution Student Project"])
@@ -0,0 +1,154 @@
+import numpy as np
+
+from pvt_Data.production_data import dataset_spec, read_csv_chunks
+from pvt_Data.pvt_dataset import PVTDataset, column_array
+
+# How to clean each raw well data source. required_columns must be present and
+# differ from their shut-in value (0 unless listed in shut_in_values) for a row
+# to be kept; feature_columns are the ACO distance columns in order. The Volve
+# entry reproduces Volvo-Data-Cleaning.ipynb, which wrote cleaned_production_data.csv.
+SCHEMAS = {
+    'volve': {
+        'dataset': 'volve',
+        'well_column': 'Wellbore name',
+        'date_column': 'Date of Production',
+        'oil_column': 'BORE_OIL_VOL',
+        'gas_column': 'BORE_GAS_VOL',
+        'water_column': 'BORE_WAT_VOL',
+        'required_columns': ['ON_STREAM_HRS', 'AVG_DOWNHOLE_PRESSURE', 'AVG_DOWNHOLE_TEMPERATURE', 'AVG_DP_TUBING',
+                             'AVG_ANNULUS_PRESS', 'AVG_CHOKE_SIZE_P', 'AVG_WHP_P', 'AVG_WHT_P', 'DP_CHOKE_SIZE',
+                             'BORE_OIL_VOL', 'BORE_GAS_VOL', 'BORE_WAT_VOL'],
+        'shut_in_values': {},
+        'dropped_columns': ['BORE_WI_VOL', 'AVG_CHOKE_UOM'],
+        'feature_columns': ['AVG_DOWNHOLE_PRESSURE', 'AVG_DOWNHOLE_TEMPERATURE', 'AVG_ANNULUS_PRESS',
+                            'AVG_CHOKE_SIZE_P', 'Calculated_GOR'],
+    },
+    'dseats': {
+        'dataset': 'dseats_training',
+        'well_column': 'WellBore Name',
+        'date_column': 'PRODUCTION DATE',
+        'oil_column': 'Oil Production (stb/day)',
+        'gas_column': 'Gas Volume (scf/day)',
+        'water_column': 'Water Production (stb/day)',
+        'required_columns': ['Downhole Pressure (PSI)', 'Downhole Temperature (F)', 'Average Tubing Pressure',
+                             'AVG WHP (PSI)', 'Choke Size', 'Oil Production (stb/day)', 'Gas Volume (scf/day)'],
+        # A missing temperature is recorded as 273.15 K, which is 32 F after conversion
+        'shut_in_values': {'Downhole Temperature (F)': 32.0},
+        'dropped_columns': [],
+        'feature_columns': ['Downhole Pressure (PSI)', 'Downhole Temperature (F)', 'Annulus Pressure (PSI)',
+                            'Choke Size', 'Calculated_GOR'],
+    },
+}
+
+
+def clean_mask(columns, schema):
+    """Boolean mask of the producing rows with every required column present and non-zero."""
+    keep = columns['FLOW_KIND'] == 'production'
+    keep &= ~np.isnat(columns[schema['date_column']])
+    for name in schema['required_columns']:
+        values = columns[name]
+        keep &= ~np.isnan(values) & (values != schema['shut_in_values'].get(name, 0))
+    return keep
+
+
+def derived_features(columns, schema):
+    """GOR and the other volume ratios of the (already cleaned) rows, column by column."""
+    oil = columns[schema['oil_column']]
+    gas = columns[schema['gas_column']]
+    water = columns[schema['water_column']]
+    liquid = oil + water
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return {
+            'Calculated_GOR': gas / oil,
+            'WATER_CUT': water / liquid,
+            'WOR': water / oil,
+            'GLR': gas / liquid,
+        }
+
+
+def clean_columns(columns, schema):
+    """Apply clean_mask to a dict of raw columns and add the derived features."""
+    keep = clean_mask(columns, schema)
+    cleaned = {name: values[keep] for name, values in columns.items() if name not in schema['dropped_columns']}
+    cleaned.update(derived_features(cleaned, schema))
+    return cleaned
+
+
+class GORFeaturePipeline:
+    """Incremental cleaning and GOR feature pipeline for raw daily well data.
+
+    append() cleans one chunk of raw columns and adds it to the history. Rows whose
+    date is not later than the last date already kept for their well are skipped,
+    so a new daily file (or a file that overlaps the history) can be appended
+    without reprocessing what came before. dataset() and feature_array() give the
+    cleaned rows as a PVTDataset and as the (n, 5) array the Volve colony uses.
+    """
+
+    def __init__(self, schema='volve'):
+        self.schema_name = schema
+        self.schema = SCHEMAS[schema]
+        self.last_dates = {}
+        self._chunks = []
+        self._dataset = None
+
+    def __len__(self):
+        return sum(len(chunk[self.schema['date_column']]) for chunk in self._chunks)
+
+    def append(self, columns):
+        """Clean a dict of raw columns (as parsed by production_data) and add the new rows; returns their count."""
+        cleaned = clean_columns(columns, self.schema)
+        wells = cleaned[self.schema['well_column']]
+        dates = cleaned[self.schema['date_column']]
+        names, well_index = np.unique(wells, return_inverse=True)
+        earliest = np.datetime64('NaT', 's')
+        last = np.array([self.last_dates.get(name, earliest) for name in names], dtype='datetime64[s]')
+        # NaT compares false, so wells seen for the first time are handled separately
+        new = np.isnat(last)[well_index] | (dates > last[well_index])
+        if not new.any():
+            return 0
+        cleaned = {name: values[new] for name, values in cleaned.items()}
+        self._update_last_dates(cleaned)
+        self._chunks.append(cleaned)
+        self._dataset = None
+        return int(new.sum())
+
+    def _update_last_dates(self, cleaned):
+        names, well_index = np.unique(cleaned[self.schema['well_column']], return_inverse=True)
+        latest = np.full(len(names), np.iinfo(np.int64).min)
+        np.maximum.at(latest, well_index, cleaned[self.schema['date_column']].astype(np.int64))
+        for name, date in zip(names, latest.astype('datetime64[s]')):
+            self.last_dates[str(name)] = date
+
+    def process_csv(self, path, chunk_size=50_000, spec=None):
+        """Append a raw CSV chunk by chunk; spec defaults to the parsing spec of the schema's dataset."""
+        spec = dataset_spec(self.schema['dataset']) if spec is None else spec
+        return sum(self.append(columns) for columns in read_csv_chunks(path, chunk_size, **spec))
+
+    def dataset(self):
+        if self._dataset is None:
+            if not self._chunks:
+                raise ValueError("No rows have been appended to the pipeline")
+            self._dataset = PVTDataset({name: np.concatenate([chunk[name] for chunk in self._chunks])
+                                        for name in self._chunks[0]})
+            # Later appends concatenate onto the merged history
+            self._chunks = [{name: self._dataset[name] for name in self._dataset.columns}]
+        return self._dataset
+
+    def feature_array(self, columns=None):
+        """The cleaned rows as a contiguous (n, k) float array of the schema's feature columns."""
+        return column_array(self.dataset(), self.schema['feature_columns'] if columns is None else columns)
+
+    def save(self, path):
+        """Store the cleaned history in an .npz file so later runs only process new files."""
+        dataset = self.dataset()
+        np.savez(path, **{f'column_{j}': dataset[name] for j, name in enumerate(dataset.columns)},
+                 names=np.array(dataset.columns))
+
+    @classmethod
+    def load(cls, path, schema='volve'):
+        pipeline = cls(schema)
+        with np.load(path) as stored:
+            columns = {str(name): stored[f'column_{j}'] for j, name in enumerate(stored['names'])}
+        pipeline._update_last_dates(columns)
+        pipeline._chunks.append(columns)
+        return pipeline
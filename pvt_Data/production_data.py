@@ -0,0 +1,181 @@
+import json
+import os
+import shutil
+
+import numpy as np
+
+from pvt_Data.pvt_dataset import PVTDataset
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Bump when the layout of the column store changes so old stores are rebuilt
+STORE_VERSION = 1
+
+
+def kelvin_to_fahrenheit(values):
+    return (values - 273.15) * 9 / 5 + 32
+
+
+# Production CSVs shipped in pvt_Data. Each entry names the file, the date column
+# with the formats its values are written in (tried in order), the text columns
+# and any unit conversions as column -> (new column name, converter). Every other
+# column is read as float64, with blank fields as NaN.
+DATASETS = {
+    'cleaned_production': {
+        'file': 'cleaned_production_data.csv',
+        'date_column': 'Date of Production',
+        'date_formats': ['%Y-%m-%d'],
+        'text_columns': ['Wellbore name', 'FLOW_KIND', 'WELL_TYPE'],
+    },
+    'volve': {
+        'file': 'volve_welldata.csv',
+        'date_column': 'Date of Production',
+        'date_formats': ['%d-%b-%y', '%m/%d/%Y'],
+        'text_columns': ['Wellbore name', 'AVG_CHOKE_UOM', 'FLOW_KIND', 'WELL_TYPE'],
+    },
+    'dseats_training': {
+        'file': 'dseats_2024_training_dataset.csv',
+        'date_column': 'PRODUCTION DATE',
+        'date_formats': ['%d/%m/%Y %H:%M'],
+        'text_columns': ['Field Name', 'WELL_BORE_CODE', 'WellBore Name', 'FLOW_KIND', 'WELL_TYPE'],
+        'units': {'Downhole Temperature (Kelvin)': ('Downhole Temperature (F)', kelvin_to_fahrenheit)},
+    },
+    'dseats_validation': {
+        'file': 'dseats_2024_validation_dataset.csv',
+        'date_column': 'PRODUCTION DATE',
+        'date_formats': ['%Y-%m-%d %H:%M:%S'],
+        'text_columns': ['Field Name', 'WELL_BORE_CODE', 'WellBore Name', 'FLOW_KIND', 'WELL_TYPE'],
+        'units': {'Downhole Temperature (Kelvin)': ('Downhole Temperature (F)', kelvin_to_fahrenheit)},
+    },
+}
+
+
+def _csv_dtypes(path, date_column, text_columns):
+    import pandas as pd
+    header = pd.read_csv(path, nrows=0, encoding='utf-8-sig').columns
+    return {name: str if name in text_columns or name == date_column else np.float64 for name in header}
+
+
+def parse_frame(frame, date_column=None, date_formats=(), text_columns=(), units=None):
+    """Convert a DataFrame of raw CSV fields into a dict of column arrays.
+
+    Dates become datetime64[s] (NaT when no format matches), text columns become
+    fixed-width unicode arrays ('' for blanks) and the rest float64. Rows that are
+    entirely blank are dropped and unit conversions are applied.
+    """
+    import pandas as pd
+    frame = frame.dropna(how='all')
+    columns = {}
+    for name in frame.columns:
+        values = frame[name]
+        if name == date_column:
+            dates = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+            for date_format in date_formats:
+                missing = dates.isna()
+                dates[missing] = pd.to_datetime(values[missing], format=date_format, errors='coerce')
+            columns[name] = dates.to_numpy(dtype='datetime64[s]')
+        elif name in text_columns:
+            columns[name] = values.fillna('').to_numpy(dtype=str)
+        else:
+            columns[name] = values.to_numpy(dtype=np.float64)
+    for name, (new_name, convert) in (units or {}).items():
+        columns[new_name] = convert(columns.pop(name))
+    return columns
+
+
+def parse_csv(path, date_column=None, date_formats=(), text_columns=(), units=None):
+    """Parse a whole production CSV into a dict of column arrays, see parse_frame."""
+    import pandas as pd
+    frame = pd.read_csv(path, dtype=_csv_dtypes(path, date_column, text_columns), encoding='utf-8-sig')
+    return parse_frame(frame, date_column, date_formats, text_columns, units)
+
+
+def read_csv_chunks(path, chunk_size=50_000, date_column=None, date_formats=(), text_columns=(), units=None):
+    """Yield a production CSV as dicts of column arrays of at most chunk_size rows each."""
+    import pandas as pd
+    dtypes = _csv_dtypes(path, date_column, text_columns)
+    for frame in pd.read_csv(path, dtype=dtypes, encoding='utf-8-sig', chunksize=chunk_size):
+        yield parse_frame(frame, date_column, date_formats, text_columns, units)
+
+
+def _spec_key(spec):
+    # Converters are identified by name so a changed conversion rebuilds the store
+    units = {name: [new_name, convert.__name__] for name, (new_name, convert) in spec.get('units', {}).items()}
+    return json.dumps({**spec, 'units': units, 'version': STORE_VERSION}, sort_keys=True)
+
+
+def _source_stamp(path):
+    stat = os.stat(path)
+    return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+
+def store_path(path, store_dir=None):
+    """Directory of the column store for a CSV: .column_store/<file name> next to it by default."""
+    store_dir = os.path.join(os.path.dirname(os.path.abspath(path)), '.column_store') if store_dir is None else store_dir
+    return os.path.join(store_dir, os.path.splitext(os.path.basename(path))[0])
+
+
+def _read_manifest(directory):
+    try:
+        with open(os.path.join(directory, 'manifest.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_store(directory, columns, manifest):
+    """Write one .npy file per column, then the manifest that marks the store complete."""
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+    manifest = dict(manifest, columns={})
+    for j, (name, values) in enumerate(columns.items()):
+        file_name = f'column_{j}.npy'
+        np.save(os.path.join(directory, file_name), values)
+        manifest['columns'][name] = file_name
+    temporary = os.path.join(directory, 'manifest.json.tmp')
+    with open(temporary, 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(temporary, os.path.join(directory, 'manifest.json'))
+    return manifest
+
+
+def load_csv(path, columns=None, store_dir=None, refresh=False, **spec):
+    """Load a production CSV as a PVTDataset through its column store.
+
+    The first call parses the CSV (see parse_csv for the spec arguments) and saves
+    every column as a .npy file. Later calls memory-map only the requested columns
+    from the store, as long as the CSV's modification time and size and the spec
+    are unchanged. If the store cannot be written the parsed columns are returned
+    directly.
+    """
+    directory = store_path(path, store_dir)
+    expected = {'source': _source_stamp(path), 'spec': _spec_key(spec)}
+    manifest = None if refresh else _read_manifest(directory)
+    if manifest is None or any(manifest.get(key) != value for key, value in expected.items()):
+        parsed = parse_csv(path, **spec)
+        try:
+            manifest = write_store(directory, parsed, expected)
+        except OSError:
+            names = list(parsed) if columns is None else columns
+            return PVTDataset({name: parsed[name] for name in names})
+
+    names = list(manifest['columns']) if columns is None else columns
+    missing = [name for name in names if name not in manifest['columns']]
+    if missing:
+        raise KeyError(f"{os.path.basename(path)} has no columns {missing}")
+    return PVTDataset({name: np.load(os.path.join(directory, manifest['columns'][name]), mmap_mode='r')
+                       for name in names})
+
+
+def dataset_spec(name):
+    """The parsing spec of one of the DATASETS (everything but the file name)."""
+    if name not in DATASETS:
+        raise ValueError(f"Unknown dataset {name!r}, expected one of {list(DATASETS)}")
+    return {key: value for key, value in DATASETS[name].items() if key != 'file'}
+
+
+def load_dataset(name, columns=None, data_dir=DATA_DIR, store_dir=None, refresh=False):
+    """Load one of the DATASETS by name, e.g. load_dataset('cleaned_production', ['Calculated_GOR'])."""
+    spec = dataset_spec(name)
+    path = os.path.join(data_dir, DATASETS[name]['file'])
+    return load_csv(path, columns=columns, store_dir=store_dir, refresh=refresh, **spec)
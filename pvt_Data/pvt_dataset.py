@@ -0,0 +1,121 @@
+import numpy as np
+
+
+class PVTDataset:
+    """Columnar PVT / production data: one contiguous NumPy array per field.
+
+    dataset['bubble_point_pressure'] returns the column array, dataset[i] returns
+    record i as a dict (so code written for the list-of-dicts pvt_data keeps
+    working), and dataset[a:b] returns a new dataset whose columns are views of
+    this one. Integer or boolean index arrays select rows into a copy.
+    """
+
+    def __init__(self, columns):
+        self._columns = {}
+        length = None
+        for name, values in columns.items():
+            values = np.asarray(values)
+            if values.dtype.kind in 'biu':
+                values = values.astype(float)
+            values = np.ascontiguousarray(values)
+            if values.ndim != 1:
+                raise ValueError(f"Column {name!r} must be one-dimensional")
+            if length is not None and len(values) != length:
+                raise ValueError("All columns must have the same length")
+            length = len(values)
+            self._columns[name] = values
+        self._length = 0 if length is None else length
+
+    @classmethod
+    def from_records(cls, records):
+        """Build from a list of dicts such as pvt_Data.pvt_data.pvt_data."""
+        names = list(records[0]) if records else []
+        return cls({name: [record[name] for record in records] for name in names})
+
+    @classmethod
+    def from_dataframe(cls, frame, columns=None):
+        columns = list(frame.columns) if columns is None else columns
+        return cls({name: frame[name].to_numpy() for name in columns})
+
+    @classmethod
+    def from_csv(cls, path, columns=None, **read_csv_kwargs):
+        """Read a CSV file (optionally only some columns) through pandas."""
+        import pandas as pd
+        return cls.from_dataframe(pd.read_csv(path, usecols=columns, **read_csv_kwargs), columns)
+
+    @property
+    def columns(self):
+        return list(self._columns)
+
+    def __len__(self):
+        return self._length
+
+    def __contains__(self, name):
+        return name in self._columns
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self._columns[key]
+        if isinstance(key, (int, np.integer)):
+            if key < 0:
+                key += self._length
+            if not 0 <= key < self._length:
+                raise IndexError("PVTDataset index out of range")
+            return {name: values[key].item() if hasattr(values[key], 'item') else values[key]
+                    for name, values in self._columns.items()}
+        # Slices give views; index arrays and masks give copies
+        return PVTDataset({name: values[key] for name, values in self._columns.items()})
+
+    def __iter__(self):
+        for i in range(self._length):
+            yield self[i]
+
+    def to_array(self, columns=None, dtype=float):
+        """The given columns stacked into a contiguous (n, len(columns)) array."""
+        columns = self.columns if columns is None else columns
+        out = np.empty((self._length, len(columns)), dtype=dtype)
+        for j, name in enumerate(columns):
+            out[:, j] = self._columns[name]
+        return out
+
+    def to_dataframe(self):
+        import pandas as pd
+        return pd.DataFrame(self._columns)
+
+    def to_records(self):
+        return list(self)
+
+
+def column_values(data, name):
+    """One column of a PVTDataset, a pandas DataFrame or a list of dicts as a float array."""
+    if isinstance(data, PVTDataset):
+        return np.asarray(data[name], dtype=float)
+    if hasattr(data, 'columns'):
+        return data[name].to_numpy(dtype=float)
+    return np.array([record[name] for record in data], dtype=float)
+
+
+def column_array(data, names):
+    """Several columns of a PVTDataset, a pandas DataFrame or a list of dicts as an (n, k) float array."""
+    if isinstance(data, PVTDataset):
+        return data.to_array(names)
+    if hasattr(data, 'columns'):
+        return np.ascontiguousarray(data[names].to_numpy(dtype=float))
+    return np.array([[record[name] for name in names] for record in data], dtype=float).reshape(len(data), len(names))
+
+
+def concat_rows(data, new_rows):
+    """data followed by new_rows, in the container type of data (PVTDataset, DataFrame or list of dicts)."""
+    if isinstance(data, PVTDataset):
+        if not isinstance(new_rows, PVTDataset):
+            new_rows = (PVTDataset.from_dataframe(new_rows) if hasattr(new_rows, 'columns')
+                        else PVTDataset.from_records(list(new_rows)))
+        return PVTDataset({name: np.concatenate([data[name], new_rows[name]]) for name in data.columns})
+    if hasattr(data, 'columns'):
+        import pandas as pd
+        if isinstance(new_rows, PVTDataset):
+            new_rows = new_rows.to_dataframe()
+        return pd.concat([data, pd.DataFrame(new_rows)], ignore_index=True)
+    if hasattr(new_rows, 'columns'):
+        new_rows = new_rows.to_dict('records')
+    return list(data) + list(new_rows)
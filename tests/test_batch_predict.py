@@ -0,0 +1,42 @@
+import importlib.util
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow')
+
+# Main-Script is not a package, so the script is loaded from its path
+_spec = importlib.util.spec_from_file_location(
+    'batch_predict', os.path.join(os.path.dirname(__file__), '..', 'Main-Script', 'batch_predict.py'))
+batch_predict = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(batch_predict)
+
+
+def test_parquet_output_of_mixed_int_and_float_chunks(tmp_path):
+    # With two rows per chunk api_gravity reads as int64 in the first chunk and float64 in the second
+    input_path = tmp_path / 'input.csv'
+    input_path.write_text('bubble_point_pressure,api_gravity,gas_gravity,reservoir_temperature\n'
+                          '1200,37,0.743,129\n'
+                          '1450,37,0.743,129\n'
+                          '1700,30.5,0.75,130.5\n'
+                          '1950,31.0,0.76,131\n')
+    output_path = tmp_path / 'output.parquet'
+
+    written = batch_predict.score_file(str(input_path), str(output_path), model='linear', chunk_size=2)
+
+    scored = pd.read_parquet(output_path)
+    assert written == len(scored) == 4
+    assert scored['api_gravity'].dtype == np.float64
+    assert scored['api_gravity'].tolist() == [37.0, 37.0, 30.5, 31.0]
+    assert np.all(np.isfinite(scored['predicted_gor']))
+
+
+def test_chunk_writer_casts_later_chunks_to_the_first_schema(tmp_path):
+    path = str(tmp_path / 'output.parquet')
+    writer = batch_predict.ChunkWriter(path)
+    writer.write(pd.DataFrame({'x': [1.5, 2.0]}))
+    writer.write(pd.DataFrame({'x': [3, 4]}))
+    writer.close()
+    assert pd.read_parquet(path)['x'].tolist() == [1.5, 2.0, 3.0, 4.0]